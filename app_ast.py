@@ -1,134 +1,27 @@
 import streamlit as st
-import sqlite3
-import json
-import re
-
-# SQLite connection setup
-conn = sqlite3.connect('rules.db', check_same_thread=False)
-c = conn.cursor()
-
-# Create the rules table if not exists
-c.execute('''
-CREATE TABLE IF NOT EXISTS rules (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    rule_string TEXT NOT NULL
-)
-''')
-conn.commit()
-
-# Define AST Node Classes
-class ASTNode:
-    pass
-
-class BinaryOperation(ASTNode):
-    def __init__(self, left, operator, right):
-        self.left = left
-        self.operator = operator
-        self.right = right
-
-class Literal(ASTNode):
-    def __init__(self, value):
-        self.value = value
-
-class Field(ASTNode):
-    def __init__(self, name):
-        self.name = name
-
-class LogicalOperation(ASTNode):
-    def __init__(self, left, operator, right):
-        self.left = left
-        self.operator = operator
-        self.right = right
-
-# SQL to JSON conversion function
-def sql_to_json(sql):
-    sql = sql.strip()
-
-    # Regex to capture basic conditions (including AND/OR)
-    pattern = r"(\w+)\s*(=|!=|<|<=|>|>=)\s*([0-9]+|'[^']+')"
-    conditions = re.findall(pattern, sql)
-
-    if not conditions:
-        return None
-
-    # Initialize JSON structure
-    json_conditions = []
-
-    for condition in conditions:
-        left, operator, right = condition
-        if right.startswith("'") and right.endswith("'"):
-            right = right[1:-1]  # Remove quotes
-
-        json_conditions.append({
-            "operator": operator,
-            "left": left,
-            "right": int(right) if right.isdigit() else right
-        })
-
-    # Check for AND/OR operations
-    if 'AND' in sql:
-        return {
-            "type": "AND",
-            "conditions": json_conditions
-        }
-    elif 'OR' in sql:
-        return {
-            "type": "OR",
-            "conditions": json_conditions
-        }
-
-    # Single condition case
-    return {
-        "type": "SINGLE",
-        "conditions": json_conditions
-    }
-
-# Parsing rules into AST
-def parse_rule(rule_dict):
-    if rule_dict['type'] == "SINGLE":
-        conditions = rule_dict['conditions']
-        return [BinaryOperation(Field(cond['left']), cond['operator'], Literal(cond['right'])) for cond in conditions]
-
-    elif rule_dict['type'] in ["AND", "OR"]:
-        left_conditions = []
-        for condition in rule_dict['conditions']:
-            left_conditions.append(BinaryOperation(Field(condition['left']), condition['operator'], Literal(condition['right'])))
-        
-        return LogicalOperation(left_conditions, rule_dict['type'], None)
-
-# Evaluating the AST
-def evaluate_ast(node, data):
-    if isinstance(node, Literal):
-        return node.value
-    elif isinstance(node, Field):
-        return data.get(node.name)
-    elif isinstance(node, BinaryOperation):
-        left_value = evaluate_ast(node.left, data)
-        right_value = evaluate_ast(node.right, data)
-
-        if node.operator == '=':
-            return left_value == right_value
-        elif node.operator == '!=':
-            return left_value != right_value
-        elif node.operator == '<':
-            return left_value < right_value
-        elif node.operator == '<=':
-            return left_value <= right_value
-        elif node.operator == '>':
-            return left_value > right_value
-        elif node.operator == '>=':
-            return left_value >= right_value
-            
-    elif isinstance(node, LogicalOperation):
-        results = []
-        for cond in node.left:
-            results.append(evaluate_ast(cond, data))
-        if node.operator == "AND":
-            return all(results)
-        elif node.operator == "OR":
-            return any(results)
-
-    return False
+import pandas as pd
+import rule_engine
+from rule_engine import combine_rules, compile_ast, evaluate_parsed_batch
+
+# Compiled rule set shared by every session, re-read only when another writer changes rules.db
+@st.cache_resource
+def get_rule_snapshot():
+    return rule_engine.RuleSnapshot(adaptive=True)
+
+# Combined rule, rebuilt only when the compiled rule set changes (only the latest version is kept)
+@st.cache_resource(max_entries=1)
+def get_combined_rule(version, _compiled):
+    return compile_ast(combine_rules(list(_compiled.rule_asts.values())))
+
+# Per-rule performance counters shared by all sessions
+@st.cache_resource
+def get_profiler():
+    return rule_engine.RuleProfiler()
+
+# Evaluation results for recently seen inputs, shared by all sessions
+@st.cache_resource
+def get_result_cache():
+    return rule_engine.ResultCache(maxsize=10000)
 
 # UI Design
 st.set_page_config(page_title="RuleCrafter", layout="wide")
@@ -137,6 +30,16 @@ st.set_page_config(page_title="RuleCrafter", layout="wide")
 st.markdown("<h1 style='text-align: center; color: #4CAF50;'>RuleCrafter</h1>", unsafe_allow_html=True)
 st.markdown("<h6 style='text-align: center; color: gray; font-size: 18px;'>Rule Engine Application</h6>", unsafe_allow_html=True)
 
+# Sidebar for Instrumentation Settings
+st.sidebar.header("Instrumentation")
+profiling_enabled = st.sidebar.checkbox("Profile rule evaluation", value=False, help="Record per-rule call counts, timings and match rates")
+profiler = get_profiler() if profiling_enabled else None
+caching_enabled = st.sidebar.checkbox("Cache evaluation results", value=True, help="Reuse results for inputs already evaluated against the current rules")
+result_cache = get_result_cache()
+
+snapshot = get_rule_snapshot()
+compiled = snapshot.refresh()
+
 # Add Rule Section
 st.markdown("## Add a New Rule", unsafe_allow_html=True)
 with st.expander("Click to Add a New Rule", expanded=True):
@@ -147,12 +50,8 @@ with st.expander("Click to Add a New Rule", expanded=True):
         if submit_rule:
             if rule_string:
                 try:
-                    # Convert SQL to JSON
-                    rule_json = sql_to_json(rule_string)
-
-                    # Store the original SQL string in the database
-                    c.execute("INSERT INTO rules (rule_string) VALUES (?)", (rule_string,))
-                    conn.commit()
+                    # Store the original SQL string along with its parsed JSON form, then compile just this rule
+                    snapshot.add_rule(rule_string)
                     st.success(f"✅ Rule added successfully!")
                 except Exception as e:
                     st.error(f"🚫 Error while processing the rule: {str(e)}")
@@ -161,8 +60,7 @@ with st.expander("Click to Add a New Rule", expanded=True):
 
 # Display Existing Rules
 st.markdown("## Existing Rules", unsafe_allow_html=True)
-c.execute("SELECT * FROM rules")
-rules = c.fetchall()
+rules = snapshot.rules
 
 if rules:
     for idx, rule in enumerate(rules, start=1):
@@ -181,9 +79,8 @@ if rules:
             rule_num = int(remove_rule_idx.split()[1]) - 1
             rule_id = rules[rule_num][0]
 
-            # Remove rule from the database
-            c.execute("DELETE FROM rules WHERE id = ?", (rule_id,))
-            conn.commit()
+            # Remove rule from the database and from the compiled rule set
+            snapshot.remove_rule(rule_id)
             st.success(f"✅ Rule '{rules[rule_num][1]}' removed successfully!")
 else:
     st.info("ℹ️ No rules to remove.")
@@ -205,36 +102,135 @@ with col2:
 # Evaluate button
 evaluate_button = st.button("Evaluate Rules", use_container_width=True)
 
-if evaluate_button:
-    results = []
-
-    c.execute("SELECT * FROM rules")
-    rules = c.fetchall()
-
-    for rule in rules:
+# Evaluate every rule once for a record: matching rule ids, per-rule errors and the combined verdict
+def evaluate_user(record):
+    matches, errors = compiled.evaluate_uncached(record)
+    combined = None
+    if compiled.rule_strings and not compiled.parse_errors:
         try:
-            # Convert SQL to JSON
-            rule_json = sql_to_json(rule[1])
-            if rule_json:
-                rule_ast = parse_rule(rule_json)
-                if isinstance(rule_ast, list):  # Handle multiple conditions
-                    result = all(evaluate_ast(cond, user_data) for cond in rule_ast)
-                else:
-                    result = evaluate_ast(rule_ast, user_data)
-                results.append((rule[1], result))
-            else:
-                results.append((rule[1], "⚠️ Error in parsing SQL statement."))
+            combined = bool(get_combined_rule(compiled.version, compiled)(record))
         except Exception as e:
-            results.append((rule[1], f"⚠️ Error in rule: {str(e)}"))
+            combined = f"⚠️ Error in combined rules: {str(e)}"
+    return set(matches), errors, combined
 
-    for rule_string, result in results:
-        if isinstance(result, bool):
-            if result:
-                st.success(f"✅ User satisfies the rule: `{rule_string}`")
-            else:
-                st.warning(f"⚠️ User does not satisfy the rule: `{rule_string}`")
+if evaluate_button:
+    # Hold the snapshot while evaluating so another session cannot change the rules midway
+    with snapshot.lock:
+        compiled.rule_set.profiler = profiler
+
+        # Inputs already seen with the same rule set are answered from the cache,
+        # except while profiling, so every evaluation reaches the per-rule counters
+        if caching_enabled and not profiling_enabled:
+            matches, errors, combined = result_cache.get(compiled, user_data, evaluate_user)
         else:
-            st.error(result)
-
-# Close SQLite connection
-conn.close()
+            matches, errors, combined = evaluate_user(user_data)
+        rule_strings = list(compiled.rule_strings.items())
+        parse_errors = set(compiled.parse_errors)
+
+    for rule_id, rule_string in rule_strings:
+        if rule_id in parse_errors:
+            if profiler:
+                profiler.record_parse_failure(rule_id)
+            st.error("⚠️ Error in parsing SQL statement.")
+        elif rule_id in errors:
+            st.error(f"⚠️ Error in rule: {errors[rule_id]}")
+        elif rule_id in matches:
+            st.success(f"✅ User satisfies the rule: `{rule_string}`")
+        else:
+            st.warning(f"⚠️ User does not satisfy the rule: `{rule_string}`")
+
+    # Verdict of the combined rule over the whole rule set
+    if combined is True:
+        st.success("✅ User satisfies all the rules!")
+    elif combined is False:
+        st.warning("⚠️ User does not satisfy all the rules.")
+    elif combined is not None:
+        st.error(combined)
+
+# Rule Performance Section
+if profiling_enabled:
+    st.markdown("## Rule Performance", unsafe_allow_html=True)
+    with st.expander("Click to View Per-Rule Statistics", expanded=False):
+        with snapshot.lock:
+            stats = profiler.report(compiled.rule_strings)
+        if stats:
+            st.dataframe(pd.DataFrame(stats), use_container_width=True, hide_index=True)
+        else:
+            st.info("ℹ️ No evaluations recorded yet.")
+        if st.button("Reset Statistics"):
+            profiler.reset()
+            st.success("✅ Rule statistics have been reset.")
+
+# Result cache counters
+if caching_enabled and profiling_enabled:
+    st.sidebar.caption("Result cache is bypassed while profiling so rule statistics count every evaluation.")
+elif caching_enabled:
+    cache_stats = result_cache.stats()
+    hit_rate = f"{cache_stats['hit_rate']:.0%}" if cache_stats['hit_rate'] is not None else "n/a"
+    st.sidebar.caption(f"Result cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                       f"({hit_rate} hit rate), {cache_stats['size']}/{cache_stats['maxsize']} entries")
+
+# Batch Evaluation Section
+st.markdown("## Batch Evaluate Rules", unsafe_allow_html=True)
+with st.expander("Click to Evaluate a CSV of Users", expanded=False):
+    uploaded_file = st.file_uploader("Upload user records (CSV with columns such as age, department, salary, experience)", type="csv")
+
+    if uploaded_file is not None:
+        try:
+            records = pd.read_csv(uploaded_file)
+            rules = snapshot.parsed_rules()
+
+            matches, errors = evaluate_parsed_batch([rule[2] for rule in rules], records)
+            for idx, error in errors.items():
+                st.warning(f"⚠️ Rule {idx + 1} could not be evaluated: {error}")
+            match_df = pd.DataFrame(matches, columns=[f"Rule {idx}" for idx in range(1, len(rules) + 1)])
+            st.dataframe(pd.concat([records, match_df], axis=1), use_container_width=True)
+            st.write(f"Matching users per rule: {dict(zip(match_df.columns, matches.sum(axis=0).tolist()))}")
+
+            # Keep these users in the records table so rules can be run against them in SQL
+            if st.button("Store Users"):
+                with snapshot.lock:
+                    stored = rule_engine.insert_records(snapshot.conn, records.astype(object).where(records.notna(), None).to_dict('records'))
+                    rule_engine.create_indexes(snapshot.conn, rule_engine.suggest_indexes(compiled.rule_asts.values()))
+                st.success(f"✅ Stored {stored} users.")
+        except Exception as e:
+            st.error(f"🚫 Error while evaluating the file: {str(e)}")
+
+# Stored Users Section
+st.markdown("## Find Matching Users", unsafe_allow_html=True)
+with st.expander("Click to Query Stored Users", expanded=False):
+    rules = snapshot.rules
+    if rules:
+        with st.form(key="query_form"):
+            query_rule_idx = st.selectbox("Select Rule Number to Query", options=[f"Rule {idx}" for idx in range(1, len(rules) + 1)])
+            query_button = st.form_submit_button("Find Matching Users", use_container_width=True)
+
+        # Queries run only on request; expander bodies execute on every rerun even when collapsed
+        if query_button:
+            rule_id, rule_string = rules[int(query_rule_idx.split()[1]) - 1]
+            rule_ast = compiled.rule_asts.get(rule_id)
+
+            if rule_ast is None:
+                st.error("⚠️ Error in parsing SQL statement.")
+            else:
+                try:
+                    # SQLite's query planner does the matching, using the indexes created when users were stored
+                    with snapshot.lock:
+                        count = rule_engine.count_matching(snapshot.conn, rule_ast)
+                        rows = rule_engine.select_matching(snapshot.conn, rule_ast, limit=100)
+                        plan = rule_engine.explain_matching(snapshot.conn, rule_ast)
+
+                    st.write(f"**{count}** stored users satisfy `{rule_string}`")
+                    if rows:
+                        st.dataframe(pd.DataFrame(rows, columns=['id'] + list(rule_engine.RECORD_COLUMNS)), use_container_width=True, hide_index=True)
+                    st.caption(f"Query plan: {'; '.join(plan)}")
+                except ValueError as e:
+                    st.error(f"⚠️ Rule cannot be run against stored users: {str(e)}")
+
+        # Rules added after the users were stored may filter on fields that are not indexed yet
+        if st.button("Create Suggested Indexes"):
+            with snapshot.lock:
+                created = rule_engine.create_indexes(snapshot.conn, rule_engine.suggest_indexes(compiled.rule_asts.values()))
+            st.success(f"✅ Indexed {', '.join(created)}." if created else "✅ All suggested indexes already exist.")
+    else:
+        st.info("ℹ️ No rules to query.")
\ No newline at end of file
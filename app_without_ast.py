@@ -1,92 +1,12 @@
 import streamlit as st
-import sqlite3
-import re
-
-# SQLite connection setup
-conn = sqlite3.connect('rules.db', check_same_thread=False)
-c = conn.cursor()
-
-# Create the rules table if not exists
-c.execute('''
-CREATE TABLE IF NOT EXISTS rules (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    rule_string TEXT NOT NULL
-)
-''')
-conn.commit()
-
-# Rule class to represent a single rule
-class Rule:
-    def __init__(self, field, operator, value):
-        self.field = field.strip()
-        self.operator = operator.strip()
-        self.value = value.strip()
-
-    def evaluate(self, data):
-        if self.field in data:
-            field_value = data[self.field]
-
-            # Adjust value conversion based on the data type
-            if isinstance(field_value, int):
-                value = int(self.value) if self.value.isdigit() else self.value
-            else:
-                value = str(self.value).strip('\"\'')  # Clean quotes for string comparison
-
-            # Use eval to evaluate the condition
-            valid_operators = {
-                '==': lambda x, y: x == y,
-                '!=': lambda x, y: x != y,
-                '<': lambda x, y: x < y,
-                '<=': lambda x, y: x <= y,
-                '>': lambda x, y: x > y,
-                '>=': lambda x, y: x >= y
-            }
-
-            if self.operator in valid_operators:
-                return valid_operators[self.operator](field_value, value)
-
-        return False
-
-# Composite rule to handle multiple conditions
-class CompositeRule:
-    def __init__(self, operator):
-        self.operator = operator
-        self.rules = []
-
-    def add_rule(self, rule):
-        self.rules.append(rule)
-
-    def evaluate(self, data):
-        results = [rule.evaluate(data) for rule in self.rules]
-        if self.operator == 'AND':
-            return all(results)
-        elif self.operator == 'OR':
-            return any(results)
-        return False
-
-# Function to create a rule object from string
-def parse_rule(rule_string):
-    rule_string = rule_string.replace('=', '==')
-    rule_string = re.sub(r'\s*==\s*', ' == ', rule_string)
-    rule_string = re.sub(r'\s*!=\s*', ' != ', rule_string)
-    rule_string = re.sub(r'\s*<\s*', ' < ', rule_string)
-    rule_string = re.sub(r'\s*>\s*', ' > ', rule_string)
-    rule_string = re.sub(r'\s*<=\s*', ' <= ', rule_string)
-    rule_string = re.sub(r'\s*>=\s*', ' >= ', rule_string)
-    
-    tokens = re.split(r'\s+(AND|OR)\s+', rule_string.strip())
-    if len(tokens) == 1:
-        parts = tokens[0].strip().split()
-        return Rule(parts[0], parts[1], ' '.join(parts[2:]))
-    
-    composite_rule = CompositeRule(tokens[1])
-    parts1 = tokens[0].strip().split()
-    parts2 = tokens[2].strip().split()
-    
-    composite_rule.add_rule(Rule(parts1[0], parts1[1], ' '.join(parts1[2:])))
-    composite_rule.add_rule(Rule(parts2[0], parts2[1], ' '.join(parts2[2:])))
-    
-    return composite_rule
+from rule_engine_without_ast import RuleSnapshot
+
+# Parsed rules shared by every session, re-read only when rules.db changes
+@st.cache_resource
+def get_rule_snapshot():
+    return RuleSnapshot()
+
+snapshot = get_rule_snapshot()
 
 # UI Design
 st.set_page_config(page_title="RuleCrafter", layout="wide")
@@ -104,16 +24,18 @@ with st.expander("Click to Add a New Rule", expanded=True):
 
         if submit_rule:
             if rule_string:
-                c.execute("INSERT INTO rules (rule_string) VALUES (?)", (rule_string,))
-                conn.commit()
-                st.success(f"✅ Rule '{rule_string}' added successfully!")
+                try:
+                    # Compiled against the field schema so type mismatches are reported now
+                    snapshot.add_rule(rule_string)
+                    st.success(f"✅ Rule '{rule_string}' added successfully!")
+                except ValueError as e:
+                    st.error(f"🚫 Invalid rule: {str(e)}")
             else:
                 st.error("🚫 Rule string cannot be empty!")
 
 # Display Existing Rules
 st.markdown("## Existing Rules", unsafe_allow_html=True)
-c.execute("SELECT * FROM rules")
-rules = c.fetchall()
+rules, composite_rule, rule_errors = snapshot.refresh()
 
 if rules:
     for idx, rule in enumerate(rules, start=1):
@@ -133,8 +55,7 @@ if rules:
             rule_id = rules[rule_num][0]
 
             # Remove rule from the database
-            c.execute("DELETE FROM rules WHERE id = ?", (rule_id,))
-            conn.commit()
+            snapshot.remove_rule(rule_id)
             st.success(f"✅ Rule '{rules[rule_num][1]}' removed successfully!")
 else:
     st.info("ℹ️ No rules to remove.")
@@ -157,20 +78,16 @@ with col2:
 evaluate_button = st.button("Evaluate Rules", use_container_width=True)
 
 if evaluate_button:
-    composite_rule = CompositeRule("AND")
-    c.execute("SELECT * FROM rules")
-    rules = c.fetchall()
+    # Rules parsed once per change to rules.db, not on every evaluation
+    rules, composite_rule, rule_errors = snapshot.refresh()
 
     for rule in rules:
-        rule_object = parse_rule(rule[1])
-        composite_rule.add_rule(rule_object)
+        if rule[0] in rule_errors:
+            st.error(f"⚠️ Skipping invalid rule `{rule[1]}`: {rule_errors[rule[0]]}")
 
     result = composite_rule.evaluate(user_data)
 
     if result:
         st.success("✅ User satisfies all the rules!")
     else:
-        st.warning("⚠️ User does not satisfy the rules.")
-
-# Close SQLite connection
-conn.close()
\ No newline at end of file
+        st.warning("⚠️ User does not satisfy the rules.")
\ No newline at end of file
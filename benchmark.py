@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import rule_engine
+import rule_engine_without_ast
+
+# ----------------------------
+# Synthetic Data
+# ----------------------------
+
+NUMERIC_FIELDS = {
+    'age': (18, 65),
+    'experience': (0, 30),
+    'salary': (20000, 200000),
+}
+DEPARTMENTS = ["Sales", "Marketing", "Engineering", "HR"]
+NUMERIC_OPERATORS = ['=', '!=', '<', '<=', '>', '>=']
+
+def generate_condition(rng, fields):
+    field = rng.choice(fields)
+    if field == 'department':
+        return f"department {rng.choice(['=', '!='])} '{rng.choice(DEPARTMENTS)}'"
+    low, high = NUMERIC_FIELDS[field]
+    return f"{field} {rng.choice(NUMERIC_OPERATORS)} {rng.randint(low, high)}"
+
+def generate_rules(count, max_conditions, fields, seed):
+    """Generate rule strings with 1..max_conditions conditions joined by a single AND/OR."""
+    rng = random.Random(seed)
+    rules = []
+    for _ in range(count):
+        conditions = [generate_condition(rng, fields) for _ in range(rng.randint(1, max_conditions))]
+        rules.append(f" {rng.choice(['AND', 'OR'])} ".join(conditions))
+    return rules
+
+def generate_records(count, seed):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(count):
+        record = {field: rng.randint(low, high) for field, (low, high) in NUMERIC_FIELDS.items()}
+        record['department'] = rng.choice(DEPARTMENTS)
+        records.append(record)
+    return records
+
+# ----------------------------
+# Engines
+# ----------------------------
+# Each engine exposes parse(rule_strings) -> parsed, compile(parsed) -> compiled
+# and evaluate(compiled, record) -> (matches, errors) for one record against every rule.
+
+def ast_parse(rule_strings):
+    parsed = []
+    for rule_id, rule_string in enumerate(rule_strings):
+        rule_json = rule_engine.sql_to_json(rule_string)
+        if rule_json:
+            parsed.append((rule_id, rule_engine.parse_rule(rule_json)))
+    return parsed
+
+def ast_evaluate(parsed, record):
+    matches = errors = 0
+    for rule_id, rule_ast in parsed:
+        try:
+            if isinstance(rule_ast, list):
+                result = all(rule_engine.evaluate_ast(cond, record) for cond in rule_ast)
+            else:
+                result = rule_engine.evaluate_ast(rule_ast, record)
+            matches += bool(result)
+        except Exception:
+            errors += 1
+    return matches, errors
+
+def compiled_compile(parsed):
+    rule_set = rule_engine.RuleSet()
+    rule_index = rule_engine.RuleIndex()
+    for rule_id, rule_ast in parsed:
+        rule_set.add(rule_id, rule_ast)
+        rule_index.add(rule_id, rule_ast)
+    return rule_set, rule_index
+
+def compiled_evaluate(compiled, record):
+    rule_set, rule_index = compiled
+    matches = errors = 0
+    memo = {}
+    for rule_id in rule_index.candidates(record):
+        try:
+            matches += bool(rule_set.evaluate_rule(rule_id, record, memo))
+        except Exception:
+            errors += 1
+    return matches, errors
+
+def compact_compile(parsed):
+    compact_rules = rule_engine.CompactRuleSet()
+    for rule_id, rule_ast in parsed:
+        compact_rules.add(rule_id, rule_ast)
+    return compact_rules
+
+def compact_evaluate(compact_rules, record):
+    matches, errors = compact_rules.evaluate(record)
+    return len(matches), len(errors)
+
+def without_ast_parse(rule_strings):
+    parsed = []
+    for rule_string in rule_strings:
+        try:
+            parsed.append(rule_engine_without_ast.parse_rule(rule_string))
+        except Exception:
+            pass
+    return parsed
+
+def without_ast_evaluate(parsed, record):
+    matches = errors = 0
+    for rule in parsed:
+        try:
+            matches += bool(rule.evaluate(record))
+        except Exception:
+            errors += 1
+    return matches, errors
+
+ENGINES = {
+    # sql_to_json + parse_rule + evaluate_ast, as originally used by app_ast.py
+    'ast': (ast_parse, None, ast_evaluate),
+    # sql_to_json + parse_rule compiled into RuleSet and RuleIndex
+    'compiled': (ast_parse, compiled_compile, compiled_evaluate),
+    # sql_to_json + parse_rule encoded into CompactRuleSet's flat arrays
+    'compact': (ast_parse, compact_compile, compact_evaluate),
+    # Rule / CompositeRule from app_without_ast.py
+    'without_ast': (without_ast_parse, None, without_ast_evaluate),
+}
+
+# ----------------------------
+# Measurement
+# ----------------------------
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def measure_memory(parse, compile_, rule_strings):
+    """Peak traced memory while building the engine's rule objects, in bytes."""
+    tracemalloc.start()
+    try:
+        parsed = parse(rule_strings)
+        if compile_:
+            compile_(parsed)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_engine(name, rule_strings, records):
+    parse, compile_, evaluate = ENGINES[name]
+
+    start = time.perf_counter()
+    parsed = parse(rule_strings)
+    parse_seconds = time.perf_counter() - start
+
+    compile_seconds = None
+    compiled = parsed
+    if compile_:
+        start = time.perf_counter()
+        compiled = compile_(parsed)
+        compile_seconds = time.perf_counter() - start
+
+    latencies = []
+    matches = errors = 0
+    start = time.perf_counter()
+    for record in records:
+        record_start = time.perf_counter()
+        record_matches, record_errors = evaluate(compiled, record)
+        latencies.append(time.perf_counter() - record_start)
+        matches += record_matches
+        errors += record_errors
+    total_seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'engine': name,
+        'rules': len(rule_strings),
+        'parsed_rules': len(parsed),
+        'records': len(records),
+        'parse_seconds': parse_seconds,
+        'compile_seconds': compile_seconds,
+        'latency_us': {
+            'p50': percentile(latencies, 0.50) * 1e6,
+            'p90': percentile(latencies, 0.90) * 1e6,
+            'p99': percentile(latencies, 0.99) * 1e6,
+            'max': latencies[-1] * 1e6,
+        },
+        'throughput_records_per_s': len(records) / total_seconds if total_seconds else None,
+        'peak_memory_bytes': measure_memory(parse, compile_, rule_strings),
+        'matches': matches,
+        'evaluation_errors': errors,
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the RuleCrafter rule engines on synthetic data")
+    parser.add_argument('--rules', type=int, nargs='+', default=[1000, 10000, 100000], help="Rule set sizes to benchmark")
+    parser.add_argument('--records', type=int, default=200, help="Records evaluated per rule set")
+    parser.add_argument('--max-conditions', type=int, default=3, help="Maximum conditions per rule")
+    parser.add_argument('--fields', nargs='+', default=list(NUMERIC_FIELDS) + ['department'],
+                        choices=list(NUMERIC_FIELDS) + ['department'], help="Fields the rules may reference")
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='benchmark_results.json', help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    records = generate_records(args.records, args.seed)
+    results = []
+    for rule_count in args.rules:
+        rule_strings = generate_rules(rule_count, args.max_conditions, args.fields, args.seed)
+        for name in args.engines:
+            result = run_engine(name, rule_strings, records)
+            results.append(result)
+            print(f"{name:>12} rules={rule_count:<7} parse={result['parse_seconds']:.3f}s "
+                  f"compile={result['compile_seconds'] or 0:.3f}s p50={result['latency_us']['p50']:.0f}us "
+                  f"p99={result['latency_us']['p99']:.0f}us throughput={result['throughput_records_per_s']:.1f}/s "
+                  f"peak_mem={result['peak_memory_bytes'] / 2**20:.1f}MiB")
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'parameters': vars(args),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1157 @@
+import sqlite3
+import csv
+import json
+import operator
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+from functools import reduce
+from itertools import islice
+import numpy as np
+
+# Default rules database shared by the RuleCrafter apps
+DB_PATH = 'rules.db'
+
+# Version of the JSON form stored in rules.rule_json; bump when sql_to_json changes
+RULE_FORMAT_VERSION = 1
+
+# Rows sent to SQLite per executemany call during bulk imports
+IMPORT_BATCH_SIZE = 10000
+
+# Define AST Node Classes (__slots__ keeps large rule sets small in memory)
+class ASTNode:
+    __slots__ = ()
+
+class BinaryOperation(ASTNode):
+    __slots__ = ('left', 'operator', 'right')
+
+    def __init__(self, left, operator, right):
+        self.left = left
+        self.operator = operator
+        self.right = right
+
+class Literal(ASTNode):
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+class Field(ASTNode):
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+class LogicalOperation(ASTNode):
+    __slots__ = ('left', 'operator', 'right')
+
+    def __init__(self, left, operator, right):
+        self.left = left
+        self.operator = operator
+        self.right = right
+
+# SQL to JSON conversion function
+def sql_to_json(sql):
+    sql = sql.strip()
+
+    # Regex to capture basic conditions (including AND/OR)
+    pattern = r"(\w+)\s*(=|!=|<|<=|>|>=)\s*([0-9]+|'[^']+')"
+    conditions = re.findall(pattern, sql)
+
+    if not conditions:
+        return None
+
+    # Initialize JSON structure
+    json_conditions = []
+
+    for condition in conditions:
+        left, operator, right = condition
+        if right.startswith("'") and right.endswith("'"):
+            right = right[1:-1]  # Remove quotes
+
+        json_conditions.append({
+            "operator": operator,
+            "left": left,
+            "right": int(right) if right.isdigit() else right
+        })
+
+    # Check for AND/OR operations
+    if 'AND' in sql:
+        return {
+            "type": "AND",
+            "conditions": json_conditions
+        }
+    elif 'OR' in sql:
+        return {
+            "type": "OR",
+            "conditions": json_conditions
+        }
+
+    # Single condition case
+    return {
+        "type": "SINGLE",
+        "conditions": json_conditions
+    }
+
+# Parsing rules into AST
+def parse_rule(rule_dict):
+    if rule_dict['type'] == "SINGLE":
+        conditions = rule_dict['conditions']
+        return [BinaryOperation(Field(cond['left']), cond['operator'], Literal(cond['right'])) for cond in conditions]
+
+    elif rule_dict['type'] in ["AND", "OR"]:
+        left_conditions = []
+        for condition in rule_dict['conditions']:
+            left_conditions.append(BinaryOperation(Field(condition['left']), condition['operator'], Literal(condition['right'])))
+        
+        return LogicalOperation(left_conditions, rule_dict['type'], None)
+
+# Evaluating the AST
+def evaluate_ast(node, data):
+    if isinstance(node, Literal):
+        return node.value
+    elif isinstance(node, Field):
+        return data.get(node.name)
+    elif isinstance(node, BinaryOperation):
+        left_value = evaluate_ast(node.left, data)
+        right_value = evaluate_ast(node.right, data)
+
+        if node.operator == '=':
+            return left_value == right_value
+        elif node.operator == '!=':
+            return left_value != right_value
+        elif node.operator == '<':
+            return left_value < right_value
+        elif node.operator == '<=':
+            return left_value <= right_value
+        elif node.operator == '>':
+            return left_value > right_value
+        elif node.operator == '>=':
+            return left_value >= right_value
+            
+    elif isinstance(node, LogicalOperation):
+        # Stop at the first condition that decides the result
+        if node.operator == "AND":
+            return all(evaluate_ast(cond, data) for cond in node.left)
+        elif node.operator == "OR":
+            return any(evaluate_ast(cond, data) for cond in node.left)
+
+    return False
+
+# Comparison functions resolved once per condition at compile time
+OPERATORS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge
+}
+
+# Compiling the AST into a single callable
+def compile_ast(node):
+    if isinstance(node, list):  # Multiple SINGLE conditions are ANDed together
+        return compile_ast(LogicalOperation(node, "AND", None))
+    elif isinstance(node, Literal):
+        value = node.value
+        return lambda data: value
+    elif isinstance(node, Field):
+        name = node.name
+        return lambda data: data.get(name)
+    elif isinstance(node, BinaryOperation):
+        compare = OPERATORS[node.operator]
+        if isinstance(node.left, Field) and isinstance(node.right, Literal):
+            # Common case: bind the field name and literal directly
+            name = node.left.name
+            value = node.right.value
+            return lambda data: compare(data.get(name), value)
+        left = compile_ast(node.left)
+        right = compile_ast(node.right)
+        return lambda data: compare(left(data), right(data))
+    elif isinstance(node, LogicalOperation):
+        conditions = [compile_ast(cond) for cond in node.left]
+        if node.operator == "AND":
+            return lambda data: all(cond(data) for cond in conditions)
+        elif node.operator == "OR":
+            return lambda data: any(cond(data) for cond in conditions)
+
+    return lambda data: False
+
+# Splitting a parsed rule into its logical operator and top-level conditions
+def rule_conditions(rule_ast):
+    if isinstance(rule_ast, list):  # Multiple SINGLE conditions are ANDed together
+        return "AND", rule_ast
+    elif isinstance(rule_ast, LogicalOperation):
+        return rule_ast.operator, rule_ast.left
+    return "AND", [rule_ast]
+
+# Names of the record fields a parsed rule reads
+def rule_fields(node):
+    if isinstance(node, list):
+        return {name for cond in node for name in rule_fields(cond)}
+    elif isinstance(node, Field):
+        return {node.name}
+    elif isinstance(node, BinaryOperation):
+        return rule_fields(node.left) | rule_fields(node.right)
+    elif isinstance(node, LogicalOperation):
+        return rule_fields(node.left)
+    return set()
+
+# Pool of unique conditions shared by every rule in a rule set
+class PredicatePool:
+    def __init__(self):
+        self.ids = {}         # (field, operator, literal type, literal) -> predicate id
+        self.predicates = []  # predicate id -> compiled condition
+        self.calls = []       # predicate id -> times evaluated (adaptive mode only)
+        self.hits = []        # predicate id -> times it was true (adaptive mode only)
+        self.refs = []        # predicate id -> number of rule references
+        self.keys = []        # predicate id -> key in self.ids, None if not shared
+        self.free = []        # released predicate ids available for reuse
+
+    def intern(self, cond):
+        key = None
+        if isinstance(cond, BinaryOperation) and isinstance(cond.left, Field) and isinstance(cond.right, Literal):
+            key = (cond.left.name, cond.operator, type(cond.right.value), cond.right.value)
+            if key in self.ids:
+                self.refs[self.ids[key]] += 1
+                return self.ids[key]
+        # Conditions that are not field/literal comparisons are compiled on their own
+        if self.free:
+            predicate_id = self.free.pop()
+            self.predicates[predicate_id] = compile_ast(cond)
+            self.calls[predicate_id] = self.hits[predicate_id] = 0
+            self.refs[predicate_id] = 1
+            self.keys[predicate_id] = key
+        else:
+            predicate_id = len(self.predicates)
+            self.predicates.append(compile_ast(cond))
+            self.calls.append(0)
+            self.hits.append(0)
+            self.refs.append(1)
+            self.keys.append(key)
+        if key is not None:
+            self.ids[key] = predicate_id
+        return predicate_id
+
+    def release(self, predicate_id):
+        # Drop one rule reference; the predicate is freed once nothing uses it
+        self.refs[predicate_id] -= 1
+        if self.refs[predicate_id] == 0:
+            if self.keys[predicate_id] is not None:
+                del self.ids[self.keys[predicate_id]]
+            self.predicates[predicate_id] = self.keys[predicate_id] = None
+            self.free.append(predicate_id)
+
+    def true_rate(self, predicate_id):
+        # Smoothed so unseen predicates start at 0.5
+        return (self.hits[predicate_id] + 1) / (self.calls[predicate_id] + 2)
+
+# Rule set compiled into a DAG of rules over shared predicates
+class RuleSet:
+    REORDER_INTERVAL = 100  # Rule evaluations between reorderings in adaptive mode
+
+    def __init__(self, adaptive=False):
+        self.pool = PredicatePool()
+        self.rules = {}  # rule id -> [logical operator, [predicate ids in evaluation order], evaluations since last reorder, [predicate ids in source order]]
+        self.adaptive = adaptive
+        self.profiler = None  # Optional RuleProfiler; None keeps evaluation unmeasured
+
+    def add(self, rule_id, rule_ast):
+        self.remove(rule_id)
+        logic, conditions = rule_conditions(rule_ast)
+        predicate_ids = [self.pool.intern(cond) for cond in conditions]
+        self.rules[rule_id] = [logic, list(predicate_ids), 0, predicate_ids]
+
+    def remove(self, rule_id):
+        rule = self.rules.pop(rule_id, None)
+        if rule:
+            for predicate_id in rule[1]:
+                self.pool.release(predicate_id)
+
+    def evaluate_rule(self, rule_id, data, memo):
+        if self.profiler is not None:
+            return self.profiler.measure(rule_id, self.run_rule, data, memo)
+        return self.run_rule(rule_id, data, memo)
+
+    def predicate_outcome(self, predicate_id, data, memo):
+        # memo holds predicate results for this record, so each predicate runs at most once;
+        # a predicate that raised is remembered as its exception
+        if predicate_id not in memo:
+            pool = self.pool
+            try:
+                memo[predicate_id] = pool.predicates[predicate_id](data)
+            except Exception as e:
+                memo[predicate_id] = e
+            if self.adaptive:
+                pool.calls[predicate_id] += 1
+                pool.hits[predicate_id] += not isinstance(memo[predicate_id], Exception) and bool(memo[predicate_id])
+        return memo[predicate_id]
+
+    def run_rule(self, rule_id, data, memo):
+        rule = self.rules[rule_id]
+        logic = rule[0]
+        # AND stops at the first false condition, OR at the first true one
+        deciding = logic != "AND"
+        decided_by = None
+        if self.adaptive:
+            rule[2] += 1
+            if rule[2] >= self.REORDER_INTERVAL:
+                self.reorder(rule)
+            # Look for the deciding condition in the learned order; errors don't stop the search
+            for predicate_id in rule[1]:
+                outcome = self.predicate_outcome(predicate_id, data, memo)
+                if not isinstance(outcome, Exception) and bool(outcome) == deciding:
+                    decided_by = predicate_id
+                    break
+
+        # The result is whatever source order gives: a condition that raises before the
+        # deciding one is an error, as in evaluate_ast, however the conditions were reordered
+        for predicate_id in rule[3]:
+            if predicate_id == decided_by:
+                return deciding
+            outcome = self.predicate_outcome(predicate_id, data, memo)
+            if isinstance(outcome, Exception):
+                raise outcome
+            if bool(outcome) == deciding:
+                return deciding
+        return not deciding
+
+    def reorder(self, rule):
+        # Most likely to fail first for AND, most likely to succeed first for OR
+        rule[1].sort(key=self.pool.true_rate, reverse=rule[0] != "AND")
+        rule[2] = 0
+
+    def evaluate(self, data, rule_ids=None):
+        memo = {}
+        return {rule_id: self.evaluate_rule(rule_id, data, memo)
+                for rule_id in (self.rules if rule_ids is None else rule_ids)}
+
+# Per-rule evaluation counters, attached to a RuleSet only while profiling
+class RuleProfiler:
+    def __init__(self):
+        self.stats = {}  # rule id -> [calls, total seconds, max seconds, matches, errors, parse failures]
+
+    def entry(self, rule_id):
+        if rule_id not in self.stats:
+            self.stats[rule_id] = [0, 0.0, 0.0, 0, 0, 0]
+        return self.stats[rule_id]
+
+    def measure(self, rule_id, evaluate, data, memo):
+        entry = self.entry(rule_id)
+        start = time.perf_counter()
+        try:
+            result = evaluate(rule_id, data, memo)
+        except Exception:
+            entry[4] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > entry[2]:
+                entry[2] = elapsed
+        entry[3] += bool(result)
+        return result
+
+    def record_parse_failure(self, rule_id):
+        self.entry(rule_id)[5] += 1
+
+    def reset(self):
+        self.stats.clear()
+
+    def report(self, rule_strings=None):
+        # One row per rule, most expensive first
+        rows = []
+        for rule_id, (calls, total, maximum, matches, errors, parse_failures) in self.stats.items():
+            rows.append({
+                'rule_id': rule_id,
+                'rule': (rule_strings or {}).get(rule_id),
+                'calls': calls,
+                'total_ms': total * 1e3,
+                'mean_us': total / calls * 1e6 if calls else 0.0,
+                'max_us': maximum * 1e6,
+                'match_rate': matches / calls if calls else 0.0,
+                'errors': errors,
+                'parse_failures': parse_failures,
+            })
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+
+# Flat encoding of a rule set in typed arrays, for very large append-only rule sets.
+# Each unique condition is a (field, operator, literal) triple of table indexes, and
+# each rule is postfix code: its condition ids followed by an AND/OR opcode.
+class CompactRuleSet:
+    OP_AND = -1
+    OP_OR = -2
+    OPERATOR_CODES = {op: code for code, op in enumerate(OPERATORS)}
+    OPERATOR_FUNCTIONS = list(OPERATORS.values())
+
+    def __init__(self):
+        self.fields = []                     # interned field names
+        self.field_ids = {}
+        self.literals = []                   # interned literal values
+        self.literal_ids = {}
+        self.condition_ids = {}              # (field id, operator code, literal id) -> condition id
+        self.condition_fields = array('I')   # condition id -> field id
+        self.condition_operators = array('B')  # condition id -> operator code
+        self.condition_literals = array('I')   # condition id -> literal id
+        self.code = array('i')               # postfix code for every rule, back to back
+        self.rule_offsets = array('I', [0])  # rule position -> start of its code; last entry is the end
+        self.rule_ids = array('q')           # rule position -> rule id
+
+    def intern_condition(self, cond):
+        if not (isinstance(cond, BinaryOperation) and isinstance(cond.left, Field) and isinstance(cond.right, Literal)):
+            raise ValueError("Only field/literal comparisons can be encoded")
+        field_id = self.field_ids.setdefault(cond.left.name, len(self.fields))
+        if field_id == len(self.fields):
+            self.fields.append(cond.left.name)
+        literal_key = (type(cond.right.value), cond.right.value)
+        literal_id = self.literal_ids.setdefault(literal_key, len(self.literals))
+        if literal_id == len(self.literals):
+            self.literals.append(cond.right.value)
+
+        key = (field_id, self.OPERATOR_CODES[cond.operator], literal_id)
+        condition_id = self.condition_ids.setdefault(key, len(self.condition_fields))
+        if condition_id == len(self.condition_fields):
+            self.condition_fields.append(key[0])
+            self.condition_operators.append(key[1])
+            self.condition_literals.append(key[2])
+        return condition_id
+
+    def add(self, rule_id, rule_ast):
+        logic, conditions = rule_conditions(rule_ast)
+        self.code.extend(self.intern_condition(cond) for cond in conditions)
+        self.code.append(self.OP_AND if logic == "AND" else self.OP_OR)
+        self.rule_offsets.append(len(self.code))
+        self.rule_ids.append(rule_id)
+
+    def evaluate(self, data):
+        # Ids of the matching rules and per-rule error messages for one record
+        code, offsets = self.code, self.rule_offsets
+        fields, literals, functions = self.fields, self.literals, self.OPERATOR_FUNCTIONS
+        condition_fields, condition_operators, condition_literals = self.condition_fields, self.condition_operators, self.condition_literals
+        field_values = [data.get(field) for field in fields]
+        state = bytearray(len(condition_fields))  # Per-condition result: 0 unknown, 1 false, 2 true, 3 error
+        condition_errors = {}
+
+        matches, errors = [], {}
+        start = 0
+        for position in range(len(self.rule_ids)):
+            end = offsets[position + 1]
+            deciding = 2 if code[end - 1] == self.OP_OR else 1  # OR stops on true, AND on false
+            result = 1 if deciding == 2 else 2
+            for condition_id in code[start:end - 1]:
+                outcome = state[condition_id]
+                if not outcome:
+                    compare = functions[condition_operators[condition_id]]
+                    try:
+                        outcome = 2 if compare(field_values[condition_fields[condition_id]], literals[condition_literals[condition_id]]) else 1
+                    except Exception as e:
+                        outcome = 3
+                        condition_errors[condition_id] = str(e)
+                    state[condition_id] = outcome
+                if outcome == 3:
+                    errors[self.rule_ids[position]] = condition_errors[condition_id]
+                    result = 3
+                    break
+                if outcome == deciding:
+                    result = deciding
+                    break
+            if result == 2:
+                matches.append(self.rule_ids[position])
+            start = end
+        return matches, errors
+
+# Combining many rules into one minimized AND tree
+def combine_rules(rule_asts):
+    atoms = {}      # field -> unique field/literal conditions on that field
+    others = []     # OR groups and conditions that cannot be folded
+    seen = set()
+    for rule_ast in rule_asts:
+        logic, conditions = rule_conditions(rule_ast)
+        if logic == "OR" and len(conditions) > 1:
+            key = ("OR", frozenset(condition_key(cond) for cond in conditions))
+            if key not in seen:
+                seen.add(key)
+                others.append(LogicalOperation(list(conditions), "OR", None))
+            continue
+        for cond in conditions:
+            key = condition_key(cond)
+            if key in seen:
+                continue
+            seen.add(key)
+            if isinstance(cond, Literal):
+                if not cond.value:
+                    return Literal(False)
+            elif key[0] == "CONDITION":
+                atoms.setdefault(cond.left.name, []).append(cond)
+            else:
+                others.append(cond)
+
+    combined = []
+    for field, conditions in atoms.items():
+        folded = fold_field_conditions(field, conditions)
+        if folded is None:
+            return Literal(False)  # Contradiction: no record can satisfy every rule
+        combined.extend(folded)
+    return LogicalOperation(combined + others, "AND", None)
+
+def condition_key(cond):
+    if isinstance(cond, BinaryOperation) and isinstance(cond.left, Field) and isinstance(cond.right, Literal):
+        return ("CONDITION", cond.left.name, cond.operator, type(cond.right.value), cond.right.value)
+    return ("NODE", id(cond))
+
+# Folding the conditions on one field; returns None when they contradict each other
+def fold_field_conditions(field, conditions):
+    literals = [cond.right.value for cond in conditions]
+    numeric = all(isinstance(value, (int, float)) for value in literals)
+    if not numeric and not all(isinstance(value, str) for value in literals):
+        return conditions  # Mixed literal types are left as they are
+
+    equals = {cond.right.value for cond in conditions if cond.operator == '='}
+    not_equals = {cond.right.value for cond in conditions if cond.operator == '!='}
+    lower = upper = None  # (value, inclusive)
+    for cond in conditions:
+        value = cond.right.value
+        if cond.operator in ('>', '>='):
+            bound = (value, cond.operator == '>=')
+            if lower is None or bound[0] > lower[0] or (bound[0] == lower[0] and not bound[1]):
+                lower = bound
+        elif cond.operator in ('<', '<='):
+            bound = (value, cond.operator == '<=')
+            if upper is None or bound[0] < upper[0] or (bound[0] == upper[0] and not bound[1]):
+                upper = bound
+
+    def in_range(value):
+        if lower and (value < lower[0] or (value == lower[0] and not lower[1])):
+            return False
+        if upper and (value > upper[0] or (value == upper[0] and not upper[1])):
+            return False
+        return True
+
+    if lower and upper and lower[0] == upper[0] and lower[1] and upper[1]:
+        equals = equals | {lower[0]}  # x >= v AND x <= v is x = v
+    if len(equals) > 1:
+        return None
+    if equals:
+        value = next(iter(equals))
+        if value in not_equals or not in_range(value):
+            return None
+        return [BinaryOperation(Field(field), '=', Literal(value))]
+    if lower and upper and (lower[0] > upper[0] or (lower[0] == upper[0] and not (lower[1] and upper[1]))):
+        return None
+
+    folded = []
+    if lower:
+        folded.append(BinaryOperation(Field(field), '>=' if lower[1] else '>', Literal(lower[0])))
+    if upper:
+        folded.append(BinaryOperation(Field(field), '<=' if upper[1] else '<', Literal(upper[0])))
+    # Exclusions outside the remaining range are already implied
+    folded.extend(BinaryOperation(Field(field), '!=', Literal(value)) for value in not_equals if in_range(value))
+    return folded
+
+# Compiling the AST into a vectorized callable over column arrays
+def compile_vectorized(node):
+    if isinstance(node, list):  # Multiple SINGLE conditions are ANDed together
+        return compile_vectorized(LogicalOperation(node, "AND", None))
+    elif isinstance(node, BinaryOperation):
+        compare = OPERATORS[node.operator]
+        name = node.left.name
+        value = node.right.value
+
+        def evaluate_column(columns, size):
+            if name not in columns:  # Records without the field never match
+                return np.zeros(size, dtype=bool)
+            return np.asarray(compare(np.asarray(columns[name]), value), dtype=bool)
+        return evaluate_column
+    elif isinstance(node, LogicalOperation):
+        conditions = [compile_vectorized(cond) for cond in node.left]
+        combine = np.logical_and if node.operator == "AND" else np.logical_or
+        return lambda columns, size: reduce(combine, [cond(columns, size) for cond in conditions])
+
+    return lambda columns, size: np.zeros(size, dtype=bool)
+
+# Evaluating every rule over a DataFrame or dict of NumPy columns at once
+def evaluate_batch(rule_jsons, columns):
+    return evaluate_parsed_batch([parse_rule(rule_json) if rule_json else None for rule_json in rule_jsons], columns)
+
+# Same, for rules already parsed (None for a rule that could not be parsed).
+# Returns the match matrix and {rule position: error message} for rules that raised
+def evaluate_parsed_batch(rule_asts, columns):
+    if isinstance(columns, dict):
+        size = max((len(column) for column in columns.values()), default=0)
+    else:  # DataFrame
+        size = len(columns)
+
+    # Boolean match matrix: one row per record, one column per rule
+    matches = np.zeros((size, len(rule_asts)), dtype=bool)
+    errors = {}
+    for idx, rule_ast in enumerate(rule_asts):
+        if rule_ast is not None:
+            try:
+                matches[:, idx] = compile_vectorized(rule_ast)(columns, size)
+            except Exception as e:  # e.g. a string range over a column with gaps; the other rules still score
+                errors[idx] = str(e)
+    return matches, errors
+
+# Predicate index narrowing a record down to the rules that can possibly match
+class RuleIndex:
+    RANGE_OPERATORS = ('<', '<=', '>', '>=')
+
+    def __init__(self):
+        self.equals = {}        # field -> {literal: set of rule ids}
+        self.ranges = {}        # (field, operator) -> ([sorted literals], [rule ids in the same order])
+        self.unindexed = set()  # rules that have to be checked for every record
+        self.entries = {}       # rule id -> conditions it is indexed under, for removal
+
+    @staticmethod
+    def is_indexable(cond):
+        if not (isinstance(cond, BinaryOperation) and isinstance(cond.left, Field) and isinstance(cond.right, Literal)):
+            return False
+        if cond.operator == '=':
+            return True
+        return cond.operator in RuleIndex.RANGE_OPERATORS and isinstance(cond.right.value, (int, float))
+
+    def add(self, rule_id, rule_ast):
+        self.remove(rule_id)
+        logic, conditions = rule_conditions(rule_ast)
+
+        indexable = [cond for cond in conditions if self.is_indexable(cond)]
+        if logic == "AND" and indexable:
+            # One condition is enough to rule the rule out; equality buckets are the most selective
+            indexable.sort(key=lambda cond: cond.operator != '=')
+            indexed = indexable[:1]
+        elif logic == "OR" and indexable and len(indexable) == len(conditions):
+            # Any condition may satisfy the rule, so it is reachable through each of them
+            indexed = indexable
+        else:
+            self.unindexed.add(rule_id)
+            indexed = []
+
+        self.entries[rule_id] = [(cond.left.name, cond.operator, cond.right.value) for cond in indexed]
+        for field, op, value in self.entries[rule_id]:
+            self.add_condition(rule_id, field, op, value)
+
+    def add_condition(self, rule_id, field, op, value):
+        if op == '=':
+            self.equals.setdefault(field, {}).setdefault(value, set()).add(rule_id)
+        else:
+            literals, rule_ids = self.ranges.setdefault((field, op), ([], []))
+            position = bisect_right(literals, value)
+            literals.insert(position, value)
+            rule_ids.insert(position, rule_id)
+
+    def remove(self, rule_id):
+        self.unindexed.discard(rule_id)
+        for field, op, value in self.entries.pop(rule_id, ()):
+            if op == '=':
+                buckets = self.equals[field]
+                buckets[value].discard(rule_id)
+                if not buckets[value]:
+                    del buckets[value]
+                if not buckets:
+                    del self.equals[field]
+            else:
+                literals, rule_ids = self.ranges[(field, op)]
+                # Only entries with an equal literal need to be scanned
+                for position in range(bisect_left(literals, value), bisect_right(literals, value)):
+                    if rule_ids[position] == rule_id:
+                        del literals[position]
+                        del rule_ids[position]
+                        break
+                if not literals:
+                    del self.ranges[(field, op)]
+
+    def candidates(self, data):
+        candidates = set(self.unindexed)
+        for field, buckets in self.equals.items():
+            value = data.get(field)
+            try:
+                candidates.update(buckets.get(value, ()))
+            except TypeError:  # Unhashable values cannot equal a literal
+                pass
+
+        for (field, op), (literals, rule_ids) in self.ranges.items():
+            value = data.get(field)
+            if not isinstance(value, (int, float)):
+                # Missing or non-numeric values can't be placed; let evaluation decide (and report errors)
+                candidates.update(rule_ids)
+                continue
+            # Slice out exactly the literals the record value satisfies
+            if op == '>':
+                candidates.update(rule_ids[:bisect_left(literals, value)])
+            elif op == '>=':
+                candidates.update(rule_ids[:bisect_right(literals, value)])
+            elif op == '<':
+                candidates.update(rule_ids[bisect_right(literals, value):])
+            elif op == '<=':
+                candidates.update(rule_ids[bisect_left(literals, value):])
+        return candidates
+
+# Compiled rule set and index kept in step as individual rules are added and removed
+class CompiledRules:
+    def __init__(self, rules=(), adaptive=False):
+        self.rule_set = RuleSet(adaptive=adaptive)
+        self.rule_index = RuleIndex()
+        self.rule_strings = {}     # rule id -> rule string, in insertion order
+        self.rule_asts = {}        # rule id -> parsed rule
+        self.parse_errors = set()  # rule ids whose rule string could not be parsed
+        self.dependents = {}       # field name -> ids of the rules reading it
+        self.version = 0           # bumped on every change
+        self.cache = None          # Optional ResultCache consulted by evaluate
+        for rule_id, rule_string, rule_json in rules:
+            self.add(rule_id, rule_string, rule_json)
+
+    def add(self, rule_id, rule_string, rule_json):
+        self.remove(rule_id)
+        self.rule_strings[rule_id] = rule_string
+        if rule_json:
+            rule_ast = parse_rule(rule_json)
+            self.rule_asts[rule_id] = rule_ast
+            for field in rule_fields(rule_ast):
+                self.dependents.setdefault(field, set()).add(rule_id)
+            self.rule_set.add(rule_id, rule_ast)
+            self.rule_index.add(rule_id, rule_ast)
+        else:
+            self.parse_errors.add(rule_id)
+        self.version += 1
+
+    def remove(self, rule_id):
+        if rule_id not in self.rule_strings:
+            return
+        del self.rule_strings[rule_id]
+        rule_ast = self.rule_asts.pop(rule_id, None)
+        if rule_ast is not None:
+            for field in rule_fields(rule_ast):
+                self.dependents[field].discard(rule_id)
+                if not self.dependents[field]:
+                    del self.dependents[field]  # Drop fields no rule reads any more
+        self.parse_errors.discard(rule_id)
+        self.rule_set.remove(rule_id)
+        self.rule_index.remove(rule_id)
+        self.version += 1
+
+    def sync(self, conn):
+        # Apply rules added or removed by other writers, loading only the new rows
+        stored_ids = {row[0] for row in conn.execute("SELECT id FROM rules")}
+        for rule_id in set(self.rule_strings) - stored_ids:
+            self.remove(rule_id)
+        for rule_id in sorted(stored_ids - set(self.rule_strings)):
+            row = conn.execute("SELECT id, rule_string, rule_json, format_version FROM rules WHERE id = ?", (rule_id,)).fetchone()
+            self.add(row[0], row[1], load_rule_json(conn, *row))
+        conn.commit()  # Persist any rules migrated while loading
+
+    def evaluate(self, record):
+        # Ids of the matching rules and per-rule error messages for one record
+        if self.cache is not None:
+            return self.cache.get(self, record, self.evaluate_uncached)
+        return self.evaluate_uncached(record)
+
+    def evaluate_uncached(self, record):
+        matches, errors = [], {}
+        memo = {}
+        for rule_id in self.rule_index.candidates(record):
+            try:
+                if self.rule_set.evaluate_rule(rule_id, record, memo):
+                    matches.append(rule_id)
+            except Exception as e:
+                errors[rule_id] = str(e)
+        return sorted(matches), errors
+
+# Last results per record, re-evaluating only the rules that read the fields a delta changes
+class EvaluationSession:
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.records = {}  # record key -> [record, matching rule ids, {rule id: error}, rule set version]
+
+    def evaluate(self, key, record):
+        # Evaluate every rule for a new or replaced record and remember the outcome
+        record = dict(record)
+        matches, errors = self.compiled.evaluate_uncached(record)
+        self.records[key] = [record, set(matches), dict(errors), self.compiled.version]
+        return matches, errors
+
+    def update(self, key, changes):
+        # Apply a field delta to a stored record; returns {rule id: new outcome} for rules that flipped
+        state = self.records[key]
+        record, matches, errors, version = state
+        if version != self.compiled.version:
+            # The rules changed since this record was evaluated, so every outcome is suspect
+            record.update(changes)
+            affected = self.compiled.rule_set.rules.keys() | matches | errors.keys()
+        else:
+            changed = [field for field, value in changes.items() if record.get(field) != value]
+            record.update(changes)
+            affected = set()
+            for field in changed:
+                affected |= self.compiled.dependents.get(field, set())
+
+        flipped = {}
+        memo = {}
+        rule_set = self.compiled.rule_set
+        # Same narrowing as evaluate(), so a delta gives the answer a full re-evaluation would
+        candidates = self.compiled.rule_index.candidates(record) if affected else set()
+        for rule_id in affected:
+            before = errors.pop(rule_id, rule_id in matches)
+            matches.discard(rule_id)
+            if rule_id not in rule_set.rules:  # Removed since the last evaluation
+                continue
+            if rule_id not in candidates:
+                after = False
+            else:
+                try:
+                    after = bool(rule_set.evaluate_rule(rule_id, record, memo))
+                except Exception as e:
+                    after = str(e)
+            if after is True:
+                matches.add(rule_id)
+            elif after is not False:
+                errors[rule_id] = after
+            if after != before:
+                flipped[rule_id] = after
+        state[3] = self.compiled.version
+        return flipped
+
+    def forget(self, key):
+        self.records.pop(key, None)
+
+    def rebind(self, compiled):
+        # Switch to a reloaded rule set; each record is fully re-evaluated on its next update
+        self.compiled = compiled
+        for state in self.records.values():
+            state[3] = None
+
+# LRU cache of evaluation results, keyed by rule set version and the record's
+# values for the fields the rules read; any change to the rules empties it
+class ResultCache:
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # (version, field values) -> result, least recently used first
+        self.rules = None             # CompiledRules the entries were computed against
+        self.version = None
+        self.fields = ()              # Sorted field names making up the key
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()  # Shared by every Streamlit session
+
+    def get(self, compiled, record, compute):
+        # Return the cached result for record, calling compute(record) on a miss
+        with self.lock:
+            if compiled is not self.rules or compiled.version != self.version:
+                self.entries.clear()
+                self.rules, self.version = compiled, compiled.version
+                self.fields = tuple(sorted(compiled.dependents))
+            key = (self.version, tuple(record.get(field) for field in self.fields))
+            try:
+                result = self.entries[key]
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return result
+            except KeyError:
+                self.misses += 1
+            except TypeError:  # Unhashable field value; evaluate without caching
+                self.misses += 1
+                key = None
+
+        result = compute(record)
+        if key is not None:
+            with self.lock:
+                if compiled is self.rules and key[0] == self.version:
+                    self.entries[key] = result
+                    if len(self.entries) > self.maxsize:
+                        self.entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+        }
+
+# ----------------------------
+# Rule Storage
+# ----------------------------
+
+def connect(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    c = conn.cursor()
+
+    # WAL lets readers keep going while a bulk import is writing
+    c.execute("PRAGMA journal_mode=WAL")
+    c.execute("PRAGMA synchronous=NORMAL")
+
+    # Create the rules table if not exists
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS rules (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        rule_string TEXT NOT NULL
+    )
+    ''')
+
+    # Add the parsed rule columns to databases created before they existed
+    existing_columns = [column[1] for column in c.execute("PRAGMA table_info(rules)")]
+    if 'rule_json' not in existing_columns:
+        c.execute("ALTER TABLE rules ADD COLUMN rule_json TEXT")
+    if 'format_version' not in existing_columns:
+        c.execute("ALTER TABLE rules ADD COLUMN format_version INTEGER")
+    conn.commit()
+
+    # Stored user records that rules can be run against in SQL
+    create_records_table(conn)
+    return conn
+
+# Loading the stored JSON form, migrating rows without a current one
+def load_rule_json(conn, rule_id, rule_string, stored_json, format_version):
+    if stored_json is not None and format_version == RULE_FORMAT_VERSION:
+        return json.loads(stored_json)
+
+    rule_json = sql_to_json(rule_string)
+    conn.execute("UPDATE rules SET rule_json = ?, format_version = ? WHERE id = ?",
+                 (json.dumps(rule_json), RULE_FORMAT_VERSION, rule_id))
+    return rule_json
+
+def load_rules(conn):
+    rows = conn.execute("SELECT id, rule_string, rule_json, format_version FROM rules ORDER BY id").fetchall()
+    rules = [(row[0], row[1], load_rule_json(conn, *row)) for row in rows]
+    conn.commit()  # Persist any rules migrated while loading
+    return rules
+
+def add_rule(conn, rule_string):
+    # Store the original SQL string along with its parsed JSON form
+    rule_json = sql_to_json(rule_string)
+    cursor = conn.execute("INSERT INTO rules (rule_string, rule_json, format_version) VALUES (?, ?, ?)",
+                          (rule_string, json.dumps(rule_json), RULE_FORMAT_VERSION))
+    conn.commit()
+    return cursor.lastrowid, rule_json
+
+def remove_rule(conn, rule_id):
+    conn.execute("DELETE FROM rules WHERE id = ?", (rule_id,))
+    conn.commit()
+
+# Process-wide compiled view of the rules table, shared by every session and thread.
+# PRAGMA data_version only changes when another connection commits, so the rules
+# are re-read only after an outside write; writes made here update the view directly.
+class RuleSnapshot:
+    def __init__(self, db_path=DB_PATH, adaptive=False):
+        self.conn = connect(db_path)
+        self.lock = threading.RLock()  # Guards the connection and the compiled rules
+        self.compiled = CompiledRules(adaptive=adaptive)
+        self.rules = ()                # (id, rule string) pairs, replaced on every change
+        self.data_version = None
+        self.reloads = 0               # Times the rules were re-read from the database
+        self.refresh()
+
+    def refresh(self):
+        # One PRAGMA when nothing has changed; otherwise load only the rows that did
+        with self.lock:
+            data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self.data_version:
+                if self.data_version is None:
+                    for rule_id, rule_string, rule_json in load_rules(self.conn):
+                        self.compiled.add(rule_id, rule_string, rule_json)
+                else:
+                    self.compiled.sync(self.conn)
+                self.data_version = data_version
+                self.reloads += 1
+                self.rules = tuple(self.compiled.rule_strings.items())
+            return self.compiled
+
+    def add_rule(self, rule_string):
+        with self.lock:
+            rule_id, rule_json = add_rule(self.conn, rule_string)
+            self.compiled.add(rule_id, rule_string, rule_json)
+            self.rules = tuple(self.compiled.rule_strings.items())
+        return rule_id
+
+    def remove_rule(self, rule_id):
+        with self.lock:
+            remove_rule(self.conn, rule_id)
+            self.compiled.remove(rule_id)
+            self.rules = tuple(self.compiled.rule_strings.items())
+
+    def parsed_rules(self):
+        # (id, rule string, parsed rule or None) for every rule, without touching the database
+        with self.lock:
+            return [(rule_id, rule_string, self.compiled.rule_asts.get(rule_id)) for rule_id, rule_string in self.rules]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# ----------------------------
+# Stored Populations
+# ----------------------------
+
+# Columns of the records table; rule fields must be one of these to run in SQL
+RECORD_COLUMNS = {
+    'age': 'INTEGER',
+    'experience': 'INTEGER',
+    'department': 'TEXT',
+    'salary': 'REAL',
+}
+
+# SQL form of each comparison. IS NOT keeps '!=' true for missing values, as in evaluate_ast
+SQL_OPERATORS = {
+    '=': '=',
+    '!=': 'IS NOT',
+    '<': '<',
+    '<=': '<=',
+    '>': '>',
+    '>=': '>='
+}
+
+def create_records_table(conn):
+    columns = ", ".join(f"{name} {column_type}" for name, column_type in RECORD_COLUMNS.items())
+    conn.execute(f"CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})")
+    conn.commit()
+
+# Inserting record dicts in one transaction; fields outside RECORD_COLUMNS are ignored
+def insert_records(conn, records, replace=False):
+    names = list(RECORD_COLUMNS)
+    rows = (tuple(record.get(name) for name in names) for record in records)
+    count = 0
+    with conn:
+        if replace:
+            conn.execute("DELETE FROM records")
+        while True:
+            batch = list(islice(rows, IMPORT_BATCH_SIZE))
+            if not batch:
+                break
+            conn.executemany(f"INSERT INTO records ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})", batch)
+            count += len(batch)
+    return count
+
+# Translating a parsed rule into a parameterized WHERE clause: (sql, params)
+def rule_to_sql(node):
+    if isinstance(node, list):  # Multiple SINGLE conditions are ANDed together
+        return rule_to_sql(LogicalOperation(node, "AND", None))
+    elif isinstance(node, BinaryOperation):
+        if not isinstance(node.left, Field) or not isinstance(node.right, Literal):
+            raise ValueError("Only field-to-literal comparisons can be translated to SQL")
+        if node.left.name not in RECORD_COLUMNS:
+            raise ValueError(f"Unknown field '{node.left.name}'")
+        # Column names come from RECORD_COLUMNS, literals are always bound as parameters
+        return f"{node.left.name} {SQL_OPERATORS[node.operator]} ?", [node.right.value]
+    elif isinstance(node, LogicalOperation):
+        clauses, params = [], []
+        for cond in node.left:
+            clause, cond_params = rule_to_sql(cond)
+            clauses.append(f"({clause})")
+            params.extend(cond_params)
+        return f" {node.operator} ".join(clauses), params
+    raise ValueError(f"Cannot translate {type(node).__name__} to SQL")
+
+# Fields worth indexing: those compared with an operator an index can serve
+def suggest_indexes(rule_asts):
+    usage = Counter()
+    for rule_ast in rule_asts:
+        logic, conditions = rule_conditions(rule_ast)
+        for cond in conditions:
+            if RuleIndex.is_indexable(cond) and cond.left.name in RECORD_COLUMNS:
+                usage[cond.left.name] += 1
+    return [field for field, _ in usage.most_common()]
+
+# Creating any missing single-column indexes; returns the fields newly indexed
+def create_indexes(conn, fields):
+    existing = {row[1] for row in conn.execute("PRAGMA index_list(records)")}
+    created = []
+    for field in fields:
+        if field not in RECORD_COLUMNS:
+            raise ValueError(f"Unknown field '{field}'")
+        if f"records_{field}_idx" not in existing:
+            conn.execute(f"CREATE INDEX records_{field}_idx ON records ({field})")
+            created.append(field)
+    if created:
+        conn.execute("ANALYZE records")  # Give the query planner row counts to choose between indexes
+    conn.commit()
+    return created
+
+def count_matching(conn, rule_ast):
+    where, params = rule_to_sql(rule_ast)
+    return conn.execute(f"SELECT COUNT(*) FROM records WHERE {where}", params).fetchone()[0]
+
+def select_matching(conn, rule_ast, limit=None):
+    where, params = rule_to_sql(rule_ast)
+    sql = f"SELECT id, {', '.join(RECORD_COLUMNS)} FROM records WHERE {where} ORDER BY id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params = params + [limit]
+    return conn.execute(sql, params).fetchall()
+
+# SQLite's plan for a rule, e.g. to check that an index is being used
+def explain_matching(conn, rule_ast):
+    where, params = rule_to_sql(rule_ast)
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN SELECT COUNT(*) FROM records WHERE {where}", params)]
+
+# ----------------------------
+# Bulk Import and Export
+# ----------------------------
+
+# Reading rule strings from a JSONL or CSV file, one rule per line or row
+def read_rule_strings(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            for row in csv.DictReader(f):
+                if row.get('rule_string'):
+                    yield row['rule_string']
+        else:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    # Each line is either {"rule_string": ...} or a bare JSON string
+                    yield entry['rule_string'] if isinstance(entry, dict) else entry
+
+# Inserting every parseable rule from a file in one transaction.
+# Returns (number imported, [(entry number, rule string)] for rules that could not be parsed)
+def import_rules(conn, path, replace=False):
+    rejected = []
+
+    def parsed_rows():
+        for position, rule_string in enumerate(read_rule_strings(path), start=1):
+            rule_json = sql_to_json(rule_string)
+            if rule_json is None:
+                rejected.append((position, rule_string))
+                continue
+            yield rule_string, json.dumps(rule_json), RULE_FORMAT_VERSION
+
+    rows = parsed_rows()
+    count = 0
+    with conn:  # Commits once at the end, or rolls the whole import back on error
+        if replace:
+            conn.execute("DELETE FROM rules")
+        while True:
+            batch = list(islice(rows, IMPORT_BATCH_SIZE))
+            if not batch:
+                break
+            conn.executemany("INSERT INTO rules (rule_string, rule_json, format_version) VALUES (?, ?, ?)", batch)
+            count += len(batch)
+    return count, rejected
+
+# Writing every rule to a JSONL or CSV file; returns the number exported
+def export_rules(conn, path):
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        cursor = conn.execute("SELECT id, rule_string FROM rules ORDER BY id")
+        if path.endswith('.csv'):
+            writer = csv.writer(f)
+            writer.writerow(['id', 'rule_string'])
+            for row in cursor:
+                writer.writerow(row)
+                count += 1
+        else:
+            for rule_id, rule_string in cursor:
+                f.write(json.dumps({'id': rule_id, 'rule_string': rule_string}) + '\n')
+                count += 1
+    return count
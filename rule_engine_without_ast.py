@@ -0,0 +1,186 @@
+import operator
+import re
+import sqlite3
+import threading
+
+# Default rules database shared by the RuleCrafter apps
+DB_PATH = 'rules.db'
+
+# Declared types of the user attributes rules may reference.
+# A tuple of strings declares an enum of allowed values.
+SCHEMA = {
+    'age': int,
+    'experience': int,
+    'salary': float,
+    'department': ('Sales', 'Marketing', 'Engineering', 'HR'),
+}
+
+# Comparison function for each operator, fixed per rule when it is parsed
+OPERATORS = {
+    '==': operator.eq,
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge
+}
+
+# Coercing a rule literal to the declared type of its field
+def coerce_literal(field, operator_symbol, value, field_type):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '\'"':
+        value = value[1:-1]  # Clean quotes for string comparison
+
+    if isinstance(field_type, (tuple, list)):
+        if operator_symbol not in ('==', '=', '!='):
+            raise ValueError(f"Field '{field}' only supports = and != comparisons")
+        if value not in field_type:
+            raise ValueError(f"'{value}' is not a valid {field} (expected one of {', '.join(field_type)})")
+        return value
+    try:
+        return field_type(value)
+    except ValueError:
+        raise ValueError(f"'{value}' is not a valid {field_type.__name__} for field '{field}'")
+
+# Rule class to represent a single rule
+class Rule:
+    def __init__(self, field, operator, value, schema=SCHEMA):
+        self.field = field.strip()
+        self.operator = operator.strip()
+        if self.field not in schema:
+            raise ValueError(f"Unknown field '{self.field}'")
+        if self.operator not in OPERATORS:
+            raise ValueError(f"Unsupported operator '{self.operator}'")
+
+        # Resolve the comparison and coerce the literal once, at parse time
+        self.compare = OPERATORS[self.operator]
+        self.value = coerce_literal(self.field, self.operator, value, schema[self.field])
+
+    def evaluate(self, data):
+        field_value = data.get(self.field)
+        if field_value is None:
+            return False
+        return self.compare(field_value, self.value)
+
+# Composite rule to handle multiple conditions
+class CompositeRule:
+    def __init__(self, operator):
+        self.operator = operator
+        self.rules = []
+
+    def add_rule(self, rule):
+        self.rules.append(rule)
+
+    def evaluate(self, data):
+        # Stop at the first rule that decides the result
+        if self.operator == 'AND':
+            return all(rule.evaluate(data) for rule in self.rules)
+        elif self.operator == 'OR':
+            return any(rule.evaluate(data) for rule in self.rules)
+        return False
+
+# A single condition: field, operator and a quoted or bare literal
+CONDITION_PATTERN = re.compile(r"^\s*(\w+)\s*(==|!=|<=|>=|=|<|>)\s*('[^']*'|\"[^\"]*\"|\S+)\s*$")
+
+def parse_condition(condition, schema):
+    match = CONDITION_PATTERN.match(condition)
+    if not match:
+        raise ValueError(f"Invalid condition '{condition.strip()}'")
+    return Rule(*match.groups(), schema=schema)
+
+# Function to create a rule object from string; AND binds tighter than OR
+def parse_rule(rule_string, schema=SCHEMA):
+    groups = []
+    for group in re.split(r'\s+OR\s+', rule_string.strip()):
+        conditions = [parse_condition(condition, schema) for condition in re.split(r'\s+AND\s+', group)]
+        if len(conditions) == 1:
+            groups.append(conditions[0])
+        else:
+            and_rule = CompositeRule('AND')
+            for condition in conditions:
+                and_rule.add_rule(condition)
+            groups.append(and_rule)
+
+    if len(groups) == 1:
+        return groups[0]
+
+    composite_rule = CompositeRule('OR')
+    for group in groups:
+        composite_rule.add_rule(group)
+    return composite_rule
+
+# Process-wide view of the stored rules, shared by every session and thread.
+# PRAGMA data_version only changes when another connection commits, so the rules
+# are re-read only after an outside write; writes made here update the view directly.
+class RuleSnapshot:
+    def __init__(self, db_path=DB_PATH, schema=SCHEMA):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            rule_string TEXT NOT NULL
+        )
+        ''')
+        self.conn.commit()
+        self.schema = schema
+        self.lock = threading.Lock()  # Guards the connection
+        self.data_version = None
+        self.reloads = 0              # Times the rules were re-read from the database
+        self.parsed = {}              # rule id -> parsed rule
+        self.current = ((), CompositeRule('AND'), {})
+        self.refresh()
+
+    def publish(self, rows, errors):
+        # Swap in the rules, their ANDed composite and the parse errors together
+        composite_rule = CompositeRule('AND')
+        for rule_id, rule_string in rows:
+            if rule_id in self.parsed:
+                composite_rule.add_rule(self.parsed[rule_id])
+        self.current = (rows, composite_rule, errors)
+
+    def load(self):
+        # Parse every stored rule once
+        rows = tuple(self.conn.execute("SELECT id, rule_string FROM rules ORDER BY id"))
+        parsed = {}
+        errors = {}  # rule id -> reason the stored rule could not be parsed
+        for rule_id, rule_string in rows:
+            try:
+                parsed[rule_id] = parse_rule(rule_string, self.schema)
+            except ValueError as e:
+                errors[rule_id] = str(e)
+        self.parsed = parsed
+        self.publish(rows, errors)
+        self.reloads += 1
+
+    def refresh(self):
+        # (rules, every valid rule ANDed together, parse errors), re-read only if rules.db changed
+        with self.lock:
+            data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self.data_version:
+                self.load()
+                self.data_version = data_version
+            return self.current
+
+    # Our own commits don't change data_version, so writes update the view here without a reload
+    def add_rule(self, rule_string):
+        rule = parse_rule(rule_string, self.schema)  # Raises ValueError before anything is stored
+        with self.lock:
+            cursor = self.conn.execute("INSERT INTO rules (rule_string) VALUES (?)", (rule_string,))
+            self.conn.commit()
+            rows, composite_rule, errors = self.current
+            self.parsed[cursor.lastrowid] = rule
+            self.publish(rows + ((cursor.lastrowid, rule_string),), errors)
+        return cursor.lastrowid
+
+    def remove_rule(self, rule_id):
+        with self.lock:
+            self.conn.execute("DELETE FROM rules WHERE id = ?", (rule_id,))
+            self.conn.commit()
+            rows, composite_rule, errors = self.current
+            self.parsed.pop(rule_id, None)
+            self.publish(tuple(row for row in rows if row[0] != rule_id), {key: error for key, error in errors.items() if key != rule_id})
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,186 @@
+import argparse
+import asyncio
+import json
+import rule_engine
+
+# ----------------------------
+# Rule Evaluation Service
+# ----------------------------
+
+class RuleService:
+    """Keep the compiled rule set in memory and evaluate records against it."""
+
+    def __init__(self, db_path=rule_engine.DB_PATH, profile=False, cache_size=10000):
+        self.db_path = db_path
+        self.profiler = rule_engine.RuleProfiler() if profile else None
+        # Cache hits skip the rules entirely, so profiling runs without the cache to count every evaluation
+        self.cache = rule_engine.ResultCache(cache_size) if cache_size and not profile else None
+        self.session = None
+        self.reload()
+
+    def reload(self):
+        """Reload and recompile every rule from the database."""
+        conn = rule_engine.connect(self.db_path)
+        try:
+            rules = rule_engine.load_rules(conn)
+        finally:
+            conn.close()
+        self.compiled = rule_engine.CompiledRules(rules, adaptive=True)
+        self.compiled.rule_set.profiler = self.profiler
+        self.compiled.cache = self.cache
+        if self.session is None:
+            self.session = rule_engine.EvaluationSession(self.compiled)
+        else:
+            self.session.rebind(self.compiled)
+        if self.profiler:
+            for rule_id in self.compiled.parse_errors:
+                self.profiler.record_parse_failure(rule_id)
+
+    def add_rule(self, rule_string):
+        """Store a new rule and compile just that rule into the in-memory set."""
+        conn = rule_engine.connect(self.db_path)
+        try:
+            rule_id, rule_json = rule_engine.add_rule(conn, rule_string)
+        finally:
+            conn.close()
+        self.compiled.add(rule_id, rule_string, rule_json)
+        return rule_id
+
+    def remove_rule(self, rule_id):
+        """Delete a rule and drop only its compiled form and index entries."""
+        conn = rule_engine.connect(self.db_path)
+        try:
+            rule_engine.remove_rule(conn, rule_id)
+        finally:
+            conn.close()
+        self.compiled.remove(rule_id)
+
+    def evaluate(self, record):
+        """Return the ids of matching rules and any per-rule errors for one record."""
+        matches, errors = self.compiled.evaluate(record)
+        return {'matches': matches, 'errors': errors}
+
+    def handle(self, method, path, body):
+        """Dispatch a request and return (status, payload)."""
+        if method == 'GET' and path == '/rules':
+            return 200, {'rules': [{'id': rule_id, 'rule_string': rule_string} for rule_id, rule_string in self.compiled.rule_strings.items()],
+                         'parse_errors': sorted(self.compiled.parse_errors)}
+        if method == 'GET' and path == '/stats':
+            if self.profiler is None and self.cache is None:
+                return 404, {'error': "Profiling and result caching are disabled; start the server with --profile"}
+            stats = {}
+            if self.profiler is not None:
+                stats['stats'] = self.profiler.report(self.compiled.rule_strings)
+            if self.cache is not None:
+                stats['cache'] = self.cache.stats()
+            return 200, stats
+        if method == 'POST' and path == '/reload':
+            self.reload()
+            return 200, {'rules': len(self.compiled.rule_strings)}
+        if method == 'DELETE' and path.startswith('/rules/'):
+            try:
+                rule_id = int(path[len('/rules/'):])
+            except ValueError:
+                return 400, {'error': "Rule id must be an integer."}
+            if rule_id not in self.compiled.rule_strings:
+                return 404, {'error': f"No rule with id {rule_id}"}
+            self.remove_rule(rule_id)
+            return 200, {'removed': rule_id}
+        if method == 'DELETE' and path.startswith('/records/'):
+            self.session.forget(path[len('/records/'):])
+            return 200, {'removed': path[len('/records/'):]}
+
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError as e:
+            return 400, {'error': f"Invalid JSON: {e}"}
+        if method == 'POST' and path == '/rules':
+            if not isinstance(payload, dict) or not payload.get('rule_string'):
+                return 400, {'error': "Expected a JSON object with a rule_string."}
+            if rule_engine.sql_to_json(payload['rule_string']) is None:
+                return 400, {'error': "Could not parse rule_string; expected conditions such as age > 30 AND department = 'Sales'."}
+            return 200, {'id': self.add_rule(payload['rule_string'])}
+        if method == 'POST' and path == '/evaluate':
+            # Accept a single record or a list of records
+            if isinstance(payload, dict):
+                return 200, self.evaluate(payload)
+            if isinstance(payload, list) and all(isinstance(record, dict) for record in payload):
+                return 200, {'results': [self.evaluate(record) for record in payload]}
+            return 400, {'error': "Expected a JSON object or a list of objects."}
+        if path.startswith('/records/') and method in ('PUT', 'PATCH'):
+            # Stored records: PUT evaluates a whole record, PATCH re-evaluates only rules reading the changed fields
+            key = path[len('/records/'):]
+            if not isinstance(payload, dict):
+                return 400, {'error': "Expected a JSON object."}
+            if method == 'PUT':
+                matches, errors = self.session.evaluate(key, payload)
+                return 200, {'matches': matches, 'errors': errors}
+            if key not in self.session.records:
+                return 404, {'error': f"No stored record {key}; PUT it first"}
+            return 200, {'flipped': self.session.update(key, payload)}
+        return 404, {'error': f"No route for {method} {path}"}
+
+# ----------------------------
+# Minimal HTTP/1.1 Server
+# ----------------------------
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}
+
+async def handle_connection(service, reader, writer):
+    """Serve requests on one keep-alive connection until the client closes it."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, path, version = request_line.decode('latin-1').split()
+            except ValueError:
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            try:
+                status, payload = service.handle(method, path.split('?')[0], body)
+            except Exception as e:
+                status, payload = 500, {'error': str(e)}
+
+            response = json.dumps(payload).encode()
+            keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+            writer.write(
+                f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(response)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + response
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(host, port, db_path, profile, cache_size):
+    service = RuleService(db_path, profile, cache_size)
+    server = await asyncio.start_server(lambda reader, writer: handle_connection(service, reader, writer), host, port)
+    print(f"Serving {len(service.compiled.rule_strings)} rules on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="RuleCrafter rule evaluation service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--db', default=rule_engine.DB_PATH, help="Path to the rules database")
+    parser.add_argument('--profile', action='store_true', help="Record per-rule statistics, served at GET /stats (disables the result cache)")
+    parser.add_argument('--cache-size', type=int, default=10000, help="Evaluation results kept in the LRU cache (0 disables it)")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.db, args.profile, args.cache_size))
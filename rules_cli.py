@@ -0,0 +1,160 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+import rule_engine
+
+# ----------------------------
+# Commands
+# ----------------------------
+
+def import_command(args):
+    """Bulk-load rules from a JSONL or CSV file."""
+    conn = rule_engine.connect(args.db)
+    try:
+        start = time.perf_counter()
+        count, rejected = rule_engine.import_rules(conn, args.path, replace=args.replace)
+        print(f"Imported {count} rules in {time.perf_counter() - start:.2f}s")
+        if rejected:
+            print(f"Skipped {len(rejected)} rules that could not be parsed:", file=sys.stderr)
+            for position, rule_string in rejected[:20]:
+                print(f"  rule {position}: {rule_string}", file=sys.stderr)
+            if len(rejected) > 20:
+                print(f"  ... and {len(rejected) - 20} more", file=sys.stderr)
+    finally:
+        conn.close()
+
+def export_command(args):
+    """Write every stored rule to a JSONL or CSV file."""
+    conn = rule_engine.connect(args.db)
+    try:
+        count = rule_engine.export_rules(conn, args.path)
+        print(f"Exported {count} rules to {args.path}")
+    finally:
+        conn.close()
+
+# ----------------------------
+# Batch Evaluation
+# ----------------------------
+
+# Compiled rules held by each worker process, loaded once by init_worker
+worker_rules = {}
+
+def init_worker(db_path, compact):
+    """Load and compile the rule set once per worker process."""
+    conn = rule_engine.connect(db_path)
+    try:
+        rules = rule_engine.load_rules(conn)
+    finally:
+        conn.close()
+    if compact:
+        compact_rules = rule_engine.CompactRuleSet()
+        for rule_id, rule_string, rule_json in rules:
+            if rule_json:
+                compact_rules.add(rule_id, rule_engine.parse_rule(rule_json))
+        worker_rules['compact'] = compact_rules
+    else:
+        worker_rules['compiled'] = rule_engine.CompiledRules(rules)
+
+def evaluate_chunk(chunk):
+    """Evaluate a chunk of (line number, record) pairs and return one result per record."""
+    rules = worker_rules.get('compact') or worker_rules['compiled']
+    results = []
+    for line_number, record in chunk:
+        matches, errors = rules.evaluate(record)
+        result = {'record': line_number, 'matches': matches}
+        if errors:
+            result['errors'] = errors
+        results.append(result)
+    return results
+
+def coerce_value(value):
+    """Turn CSV text into an int or float where possible, as the rule literals expect."""
+    for number_type in (int, float):
+        try:
+            return number_type(value)
+        except ValueError:
+            pass
+    return value
+
+def read_records(f, is_csv):
+    """Yield (line number, record) pairs from a JSONL or CSV stream."""
+    if is_csv:
+        for line_number, row in enumerate(csv.DictReader(f), start=1):
+            # Empty (or missing trailing) cells are left out, so the field counts as absent
+            yield line_number, {field: coerce_value(value) for field, value in row.items() if value not in ('', None)}
+    else:
+        for line_number, line in enumerate(f, start=1):
+            if line.strip():
+                yield line_number, json.loads(line)
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def evaluate_command(args):
+    """Stream records through a worker pool and write one JSON result line per record."""
+    source = sys.stdin if args.input == '-' else open(args.input, newline='', encoding='utf-8')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    is_csv = args.format == 'csv' or (args.format is None and args.input.endswith('.csv'))
+    # Bound the chunks in flight so memory stays flat however large the input is
+    max_pending = args.workers * 2
+    start = time.perf_counter()
+    count = 0
+    try:
+        with Pool(args.workers, initializer=init_worker, initargs=(args.db, args.compact)) as pool:
+            pending = deque()
+            for chunk in chunked(read_records(source, is_csv), args.chunk_size):
+                pending.append(pool.apply_async(evaluate_chunk, (chunk,)))
+                while len(pending) >= max_pending or (pending and pending[0].ready()):
+                    count += write_results(pending.popleft().get(), output)
+            while pending:
+                count += write_results(pending.popleft().get(), output)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(f"Evaluated {count} records in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+def write_results(results, output):
+    for result in results:
+        output.write(json.dumps(result) + '\n')
+    return len(results)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="RuleCrafter command-line tools")
+    parser.add_argument('--db', default=rule_engine.DB_PATH, help="Path to the rules database")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help="Import rules from a .jsonl or .csv file")
+    import_parser.add_argument('path')
+    import_parser.add_argument('--replace', action='store_true', help="Replace all existing rules in the same transaction")
+    import_parser.set_defaults(func=import_command)
+
+    export_parser = commands.add_parser('export', help="Export rules to a .jsonl or .csv file")
+    export_parser.add_argument('path')
+    export_parser.set_defaults(func=export_command)
+
+    evaluate_parser = commands.add_parser('evaluate', help="Evaluate records from a .jsonl or .csv file against the stored rules")
+    evaluate_parser.add_argument('input', help="Input file, or - for stdin")
+    evaluate_parser.add_argument('-o', '--output', default='-', help="Output JSONL file, or - for stdout (default)")
+    evaluate_parser.add_argument('--format', choices=['jsonl', 'csv'], help="Input format (default: from the file extension)")
+    evaluate_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    evaluate_parser.add_argument('--compact', action='store_true', help="Hold rules in the flat array encoding to reduce worker memory (evaluates every rule, so errors are reported for rules the index would skip)")
+    evaluate_parser.add_argument('--chunk-size', type=int, default=1000, help="Records sent to a worker at a time")
+    evaluate_parser.set_defaults(func=evaluate_command)
+    return parser
+
+if __name__ == '__main__':
+    args = build_parser().parse_args()
+    args.func(args)
@@ -3,20 +3,36 @@ import pandas as pd
 import streamlit as st
 from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy import create_engine, Column, Float, Integer, Date, String, func
+from sqlalchemy import create_engine, event, insert, Column, Boolean, Float, Integer, Date, DateTime, JSON, String, func
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import declarative_base, sessionmaker
 from PIL import Image
-from io import BytesIO
 import requests.exceptions
-from collections import defaultdict
+from requests.adapters import HTTPAdapter
+from concurrent.futures import Future, ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from collections import defaultdict, OrderedDict
 from smtplib import SMTP  # For email alerts (optional)
+import atexit
 import os
+import re
+import threading
+import time
 
 # ----------------------------
 # Database Setup
 # ----------------------------
 Base = declarative_base()
 engine = create_engine('sqlite:///weather_data.db')
+
+# WAL lets the dashboard keep reading while a batch of readings is being written
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
 Session = sessionmaker(bind=engine)
 session = Session()
 
@@ -40,6 +56,25 @@ class DailySummary(Base):
     min_temp = Column(Float)
     dominant_condition = Column(String)
 
+class DailyAggregate(Base):
+    __tablename__ = 'daily_aggregates'
+    city = Column(String, primary_key=True)
+    date = Column(Date, primary_key=True)
+    reading_count = Column(Integer)
+    temp_sum = Column(Float)
+    max_temp = Column(Float)
+    min_temp = Column(Float)
+    condition_counts = Column(JSON)  # Main condition -> number of readings
+
+class GeocodeCache(Base):
+    __tablename__ = 'geocode_cache'
+    city = Column(String, primary_key=True)  # Normalized city name
+    lat = Column(Float)
+    lon = Column(Float)
+    location_id = Column(Integer)
+    found = Column(Boolean)  # False caches a city the API does not know
+    fetched_at = Column(DateTime)
+
 Base.metadata.create_all(engine)
 
 # ----------------------------
@@ -53,6 +88,45 @@ API_URL = "http://api.openweathermap.org/geo/1.0/direct"
 WEATHER_API_URL = "https://api.openweathermap.org/data/2.5/weather"
 FORECAST_API_URL = "https://api.openweathermap.org/data/2.5/forecast"
 
+# Weather Icons
+ICON_URL = "http://openweathermap.org/img/wn/{code}{size}.png"
+ICON_CACHE_DIR = os.getenv('WEATHER_ICON_CACHE_DIR', 'icon_cache')
+ICON_CODES = [f"{number:02d}{time_of_day}" for number in (1, 2, 3, 4, 9, 10, 11, 13, 50) for time_of_day in 'dn']  # Every icon the API uses
+
+# HTTP Settings
+FETCH_CONCURRENCY = int(os.getenv('WEATHER_FETCH_CONCURRENCY', '16'))  # Cities fetched in parallel
+REQUEST_TIMEOUT = (float(os.getenv('WEATHER_CONNECT_TIMEOUT', '3.05')), float(os.getenv('WEATHER_READ_TIMEOUT', '10')))  # (connect, read) seconds
+
+# Pooled keep-alive HTTP client shared by every API call and every rerun
+@st.cache_resource
+def get_http_session():
+    http_session = requests.Session()
+    http_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=FETCH_CONCURRENCY))
+    http_session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=FETCH_CONCURRENCY))
+    return http_session
+
+http = get_http_session()
+
+# Response Cache (seconds each endpoint's answers stay fresh, then how long a stale answer may still be served)
+RESPONSE_TTLS = {
+    WEATHER_API_URL: 60 * float(os.getenv('WEATHER_CURRENT_TTL_MINUTES', '10')),
+    FORECAST_API_URL: 60 * float(os.getenv('WEATHER_FORECAST_TTL_MINUTES', '180')),
+}
+STALE_TTL = 60 * float(os.getenv('WEATHER_STALE_TTL_MINUTES', '60'))
+
+# Geocoding Cache (coordinates never change, unknown cities are retried after a day)
+GEOCODE_TTL = timedelta(days=int(os.getenv('WEATHER_GEOCODE_TTL_DAYS', '365')))
+GEOCODE_NEGATIVE_TTL = timedelta(hours=int(os.getenv('WEATHER_GEOCODE_NEGATIVE_TTL_HOURS', '24')))
+@st.cache_resource
+def get_geocode_memory():
+    return {}  # Normalized city name -> (coordinates or None, expiry time)
+
+geocode_memory = get_geocode_memory()
+
+# Batched Writes (readings are flushed once per refresh, or sooner past either threshold)
+WRITE_BATCH_SIZE = int(os.getenv('WEATHER_WRITE_BATCH_SIZE', '500'))
+WRITE_INTERVAL = float(os.getenv('WEATHER_WRITE_INTERVAL_SECONDS', '30'))
+
 # Alert Thresholds and Tracking
 ALERT_THRESHOLD = 35  # Default threshold for temperature
 TEMP_ALERT_CONSECUTIVE_COUNT = 2  # Alert after 2 consecutive breaches
@@ -65,10 +139,54 @@ scheduler = BackgroundScheduler()
 # Helper Functions
 # ----------------------------
 
+def load_cached_coordinates(key):
+    """Look up a city in the in-memory and SQLite geocoding caches; returns (found in cache, coordinates)."""
+    now = datetime.now()
+    entry = geocode_memory.get(key)
+    if entry and entry[1] > now:
+        return True, entry[0]
+
+    try:
+        with Session() as db_session:
+            cached = db_session.get(GeocodeCache, key)
+    except SQLAlchemyError:
+        return False, None  # The cache is best-effort; ask the API instead
+    if cached:
+        expires_at = cached.fetched_at + (GEOCODE_TTL if cached.found else GEOCODE_NEGATIVE_TTL)
+        if expires_at > now:
+            coordinates = {'lat': cached.lat, 'lon': cached.lon, 'id': cached.location_id} if cached.found else None
+            geocode_memory[key] = (coordinates, expires_at)
+            return True, coordinates
+    return False, None
+
+def store_cached_coordinates(key, coordinates):
+    """Persist a geocoding result, including the absence of one."""
+    now = datetime.now()
+    found = coordinates is not None
+    geocode_memory[key] = (coordinates, now + (GEOCODE_TTL if found else GEOCODE_NEGATIVE_TTL))
+    try:
+        with Session() as db_session:
+            db_session.merge(GeocodeCache(
+                city=key,
+                lat=coordinates['lat'] if found else None,
+                lon=coordinates['lon'] if found else None,
+                location_id=coordinates['id'] if found else None,
+                found=found,
+                fetched_at=now
+            ))
+            db_session.commit()
+    except SQLAlchemyError:
+        pass  # e.g. the database is locked, or another thread stored the same city first; memory still has it
+
 def fetch_coordinates(city_name):
     """Fetch latitude and longitude for a given city."""
+    key = city_name.strip().lower()
+    cached, coordinates = load_cached_coordinates(key)
+    if cached:
+        return coordinates
+
     try:
-        response = requests.get(API_URL, params={'q': city_name, 'limit': 1, 'appid': API_KEY})
+        response = http.get(API_URL, params={'q': city_name, 'limit': 1, 'appid': API_KEY}, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
     except requests.ConnectionError:
         st.error("No internet connection. Please check your connection and try again.")
@@ -78,19 +196,106 @@ def fetch_coordinates(city_name):
         return None
 
     data = response.json()
+    coordinates = None
     if data:
-        return {
+        coordinates = {
             'lat': data[0]['lat'],
             'lon': data[0]['lon'],
             'id': data[0].get('id')  # Use .get() to avoid KeyError
         }
-    return None
+
+    # Only answers from the API are cached; request errors above are retried next time
+    store_cached_coordinates(key, coordinates)
+    return coordinates
+
+class ResponseCache:
+    """API responses kept for a per-endpoint TTL; identical requests in flight share one call."""
+
+    def __init__(self, ttls=RESPONSE_TTLS, stale_ttl=STALE_TTL):
+        self.ttls = ttls
+        self.stale_ttl = stale_ttl
+        self.entries = {}   # (url, params) -> (JSON data, monotonic time fetched)
+        self.inflight = {}  # (url, params) -> Future of the request being made
+        self.lock = threading.Lock()
+        self.refresher = ThreadPoolExecutor(max_workers=4)
+
+    def get_json(self, url, params):
+        """Return the endpoint's JSON, from cache while fresh or stale-but-refreshing."""
+        key = (url, tuple(sorted(params.items())))
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry:
+            age = time.monotonic() - entry[1]
+            ttl = self.ttls.get(url, 0)
+            if age < ttl:
+                return entry[0]
+            if age < ttl + self.stale_ttl:
+                # Answer with the stale copy now and refresh it for the next caller
+                with self.lock:
+                    refreshing = key in self.inflight
+                if not refreshing:
+                    self.refresher.submit(self.refresh, key)
+                return entry[0]
+        return self.fetch(key)
+
+    def fetch(self, key):
+        """Make the request, or wait for the identical one already in flight."""
+        with self.lock:
+            future = self.inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self.inflight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            url, params = key
+            response = http.get(url, params=dict(params), timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            future.set_exception(e)  # Errors are passed on but never cached
+            raise
+        else:
+            with self.lock:
+                self.entries[key] = (data, time.monotonic())
+            future.set_result(data)
+            return data
+        finally:
+            with self.lock:
+                del self.inflight[key]
+
+    def refresh(self, key):
+        try:
+            self.fetch(key)
+        except Exception:
+            pass  # Keep serving the stale entry until it expires
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache()
+
+response_cache = get_response_cache()
+
+# Observation time of the latest reading stored per city, so a cached answer is stored only once
+@st.cache_resource
+def get_latest_readings():
+    return {}, threading.Lock()
+
+def is_new_reading(weather_data):
+    """Record a reading's observation time; False if it is not newer than the city's last one."""
+    latest_readings, lock = get_latest_readings()
+    with lock:
+        latest = latest_readings.get(weather_data['city'])
+        if latest is not None and weather_data['timestamp'] <= latest:
+            return False
+        latest_readings[weather_data['city']] = weather_data['timestamp']
+        return True
 
 def fetch_weather_data(lat, lon, units='metric'):
     """Fetch current weather data for given coordinates."""
     try:
-        response = requests.get(WEATHER_API_URL, params={'lat': lat, 'lon': lon, 'appid': API_KEY, 'units': units})
-        response.raise_for_status()
+        data = response_cache.get_json(WEATHER_API_URL, {'lat': lat, 'lon': lon, 'appid': API_KEY, 'units': units})
     except requests.ConnectionError:
         st.error("No internet connection. Please check your connection and try again.")
         return None
@@ -98,21 +303,19 @@ def fetch_weather_data(lat, lon, units='metric'):
         st.error(f"Error fetching weather data: {e}")
         return None
 
-    data = response.json()
     return {
         'city': data['name'],
         'main': data['weather'][0]['main'],
         'temp': data['main']['temp'],  # Already in Celsius if units='metric'
         'feels_like': data['main']['feels_like'],
         'icon': data['weather'][0]['icon'],  # Get the weather icon
-        'timestamp': datetime.now()
+        'timestamp': datetime.fromtimestamp(data['dt']) if 'dt' in data else datetime.now()  # When the API observed it
     }
 
 def fetch_weather_forecast(lat, lon, units='metric'):
     """Fetch 5-day weather forecast for given coordinates."""
     try:
-        response = requests.get(FORECAST_API_URL, params={'lat': lat, 'lon': lon, 'appid': API_KEY, 'units': units})
-        response.raise_for_status()
+        data = response_cache.get_json(FORECAST_API_URL, {'lat': lat, 'lon': lon, 'appid': API_KEY, 'units': units})
     except requests.ConnectionError:
         st.error("No internet connection. Please check your connection and try again.")
         return None
@@ -120,7 +323,6 @@ def fetch_weather_forecast(lat, lon, units='metric'):
         st.error(f"Error fetching weather forecast: {e}")
         return None
 
-    data = response.json()
     print(data)
     forecast_list = []
     if 'list' in data:
@@ -136,47 +338,101 @@ def fetch_weather_forecast(lat, lon, units='metric'):
 
     return forecast_list
 
+class WeatherWriter:
+    """Buffer readings and write them, with their daily aggregates, in one transaction per batch."""
+
+    def __init__(self, session_factory, batch_size=WRITE_BATCH_SIZE, interval=WRITE_INTERVAL):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self.buffer = []
+        self.first_buffered = None  # Monotonic time the oldest buffered reading arrived
+        self.lock = threading.Lock()        # Guards the buffer
+        self.flush_lock = threading.Lock()  # One batch is written at a time
+
+    def add(self, weather_data):
+        with self.lock:
+            if not self.buffer:
+                self.first_buffered = time.monotonic()
+            self.buffer.append(weather_data)
+            due = len(self.buffer) >= self.batch_size or time.monotonic() - self.first_buffered >= self.interval
+        if due:
+            try:
+                self.flush()
+            except SQLAlchemyError:
+                pass  # The readings stay buffered; the next flush retries them and reports the error
+
+    def flush(self):
+        """Write every buffered reading; returns the number written."""
+        with self.flush_lock:
+            with self.lock:
+                readings, self.buffer = self.buffer, []
+                first_buffered = self.first_buffered
+            if not readings:
+                return 0
+
+            # Group by city and day so each aggregate row is read and written once per batch
+            readings_by_day = defaultdict(list)
+            for weather_data in readings:
+                readings_by_day[(weather_data['city'], weather_data['timestamp'].date())].append(weather_data)
+
+            try:
+                with self.session_factory() as db_session, db_session.begin():
+                    db_session.execute(insert(CurrentWeather), [{
+                        'city': weather_data['city'],
+                        'main_condition': weather_data['main'],
+                        'temperature': weather_data['temp'],
+                        'feels_like': weather_data['feels_like'],
+                        'timestamp': weather_data['timestamp'].date()
+                    } for weather_data in readings])
+                    for (city, day), day_readings in readings_by_day.items():
+                        update_daily_aggregates(db_session, city, day, day_readings)
+            except Exception:
+                # The transaction was rolled back; put the readings back ahead of any that arrived meanwhile
+                with self.lock:
+                    self.buffer[:0] = readings
+                    self.first_buffered = first_buffered
+                raise
+            return len(readings)
+
+@st.cache_resource
+def get_weather_writer():
+    weather_writer = WeatherWriter(Session)
+    atexit.register(weather_writer.flush)  # Don't lose a partial batch on shutdown
+    return weather_writer
+
+weather_writer = get_weather_writer()
+
 def store_current_weather(weather_data):
-    """Store current weather data in the database."""
-    current_weather = CurrentWeather(
-        city=weather_data['city'],
-        main_condition=weather_data['main'],
-        temperature=weather_data['temp'],
-        feels_like=weather_data['feels_like'],
-        timestamp=weather_data['timestamp'].date()
-    )
-    session.add(current_weather)
-    session.commit()
-
-def calculate_daily_aggregates():
-    """Calculate and store daily weather aggregates."""
-    today = datetime.now().date()
-    for city in CITIES:
-        weather_today = session.query(CurrentWeather).filter(CurrentWeather.city == city, CurrentWeather.timestamp == today).all()
-        if weather_today:
-            temps = [record.temperature for record in weather_today]
-            conditions = [record.main_condition for record in weather_today]
-
-            avg_temp = sum(temps) / len(temps)
-            max_temp = max(temps)
-            min_temp = min(temps)
-            dominant_condition = max(set(conditions), key=conditions.count)  # Most frequent condition
-
-            # Store in DailySummary
-            existing_summary = session.query(DailySummary).filter(DailySummary.city == city, DailySummary.date == today).first()
-            if not existing_summary:
-                daily_summary = DailySummary(
-                    city=city,
-                    date=today,
-                    avg_temp=avg_temp,
-                    max_temp=max_temp,
-                    min_temp=min_temp,
-                    dominant_condition=dominant_condition
-                )
-                session.add(daily_summary)
-                session.commit()
-
-    st.success("Daily weather summaries have been updated.")
+    """Queue current weather data for the next batched database write."""
+    weather_writer.add(weather_data)
+
+def update_daily_aggregates(db_session, city, day, readings):
+    """Fold new readings into the running totals for a city and day, keeping DailySummary current."""
+    aggregate = db_session.get(DailyAggregate, (city, day))
+    if aggregate is None:
+        first_temp = readings[0]['temp']
+        aggregate = DailyAggregate(city=city, date=day, reading_count=0, temp_sum=0.0, max_temp=first_temp, min_temp=first_temp, condition_counts={})
+        db_session.add(aggregate)
+
+    condition_counts = dict(aggregate.condition_counts)  # Reassigned so the JSON column is marked changed
+    for weather_data in readings:
+        temp = weather_data['temp']
+        aggregate.reading_count += 1
+        aggregate.temp_sum += temp
+        aggregate.max_temp = max(aggregate.max_temp, temp)
+        aggregate.min_temp = min(aggregate.min_temp, temp)
+        condition_counts[weather_data['main']] = condition_counts.get(weather_data['main'], 0) + 1
+    aggregate.condition_counts = condition_counts
+
+    daily_summary = db_session.query(DailySummary).filter(DailySummary.city == city, DailySummary.date == day).first()
+    if not daily_summary:
+        daily_summary = DailySummary(city=city, date=day)
+        db_session.add(daily_summary)
+    daily_summary.avg_temp = aggregate.temp_sum / aggregate.reading_count
+    daily_summary.max_temp = aggregate.max_temp
+    daily_summary.min_temp = aggregate.min_temp
+    daily_summary.dominant_condition = max(condition_counts, key=condition_counts.get)  # Most frequent condition
 
 def check_for_alerts(weather):
     """Check if the weather data breaches the alert thresholds."""
@@ -213,28 +469,52 @@ def send_email_alert(city, temperature):
 # Initialize the weather_data_for_day dictionary
 weather_data_for_day = {}
 
-def get_weather_updates():
+def fetch_city_weather(city):
+    """Fetch current weather for one city by name."""
+    coordinates = fetch_coordinates(city)
+    if coordinates:
+        return fetch_weather_data(coordinates['lat'], coordinates['lon'], units='metric')
+    return None
+
+def get_weather_updates(concurrency=None):
     """Fetch and process weather updates for all cities."""
+    cities = list(CITIES)
     weather_list = []
-    for city in CITIES:
-        coordinates = fetch_coordinates(city)
-        if coordinates:
-            weather_data = fetch_weather_data(coordinates['lat'], coordinates['lon'], units='metric')
-            if weather_data is not None:
-                # Check for alert conditions
-                check_for_alerts(weather_data)
+    if not cities:
+        return weather_list
+
+    # Fetch every city at once; worker threads share the Streamlit context so errors still show up
+    workers = min(concurrency or FETCH_CONCURRENCY, len(cities))
+    with ThreadPoolExecutor(max_workers=workers, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx())) as executor:
+        results = list(executor.map(fetch_city_weather, cities))
+
+    for city, weather_data in zip(cities, results):
+        if weather_data is None:
+            continue
+        weather_list.append(weather_data)
+
+        # A cached answer is shown again but was already stored, aggregated and checked
+        if not is_new_reading(weather_data):
+            continue
+
+        # Check for alert conditions
+        check_for_alerts(weather_data)
 
-                # Initialize the city in the weather_data_for_day dictionary if not present
-                if city not in weather_data_for_day:
-                    weather_data_for_day[city] = []  # Initialize with an empty list if the city is new
+        # Initialize the city in the weather_data_for_day dictionary if not present
+        if city not in weather_data_for_day:
+            weather_data_for_day[city] = []  # Initialize with an empty list if the city is new
 
-                # Collect weather data for daily summary
-                weather_data_for_day[city].append(weather_data)
+        # Collect weather data for daily summary
+        weather_data_for_day[city].append(weather_data)
 
-                # Store current weather data
-                store_current_weather(weather_data)
+        # Store current weather data
+        store_current_weather(weather_data)
 
-                weather_list.append(weather_data)
+    # Write the whole refresh cycle in one transaction
+    try:
+        weather_writer.flush()
+    except SQLAlchemyError as e:
+        st.error(f"Error saving weather data, it will be retried on the next refresh: {e}")
     return weather_list
 
 
@@ -279,6 +559,61 @@ def get_weather_forecast_display(city):
             return display_forecast
     return None
 
+class IconCache:
+    """Decoded weather icons keyed by icon code and size, backed by PNG files on disk."""
+
+    def __init__(self, directory=ICON_CACHE_DIR, maxsize=64):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.images = OrderedDict()  # (code, size) -> decoded image, least recently used first
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, code, size='@2x'):
+        """Return the icon image, reading it from disk or downloading it only when missing."""
+        key = (code, size)
+        with self.lock:
+            if key in self.images:
+                self.images.move_to_end(key)
+                return self.images[key]
+
+        if not re.fullmatch(r'\w+', code) or size not in ('', '@2x', '@4x'):
+            raise ValueError(f"Invalid icon {code}{size}")
+        path = os.path.join(self.directory, f"{code}{size}.png")
+        if not os.path.exists(path):
+            response = http.get(ICON_URL.format(code=code, size=size), timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(response.content)
+            os.replace(temp_path, path)  # Readers never see a partly written file
+
+        img = Image.open(path)
+        img.load()
+        with self.lock:
+            self.images[key] = img
+            if len(self.images) > self.maxsize:
+                self.images.popitem(last=False)
+        return img
+
+    def prefetch(self, codes=ICON_CODES, size='@2x'):
+        """Load every known icon so renders never wait on the network."""
+        def fetch(code):
+            try:
+                self.get(code, size)
+            except (requests.RequestException, OSError):
+                pass  # Fetched on demand instead
+
+        with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY) as executor:
+            list(executor.map(fetch, codes))
+
+@st.cache_resource
+def get_icon_cache():
+    """Process-wide icon cache, warmed in the background on first use."""
+    icon_cache = IconCache()
+    threading.Thread(target=icon_cache.prefetch, daemon=True).start()
+    return icon_cache
+
 # ----------------------------
 # Streamlit UI Components
 # ----------------------------
@@ -336,6 +671,8 @@ if CITIES:
             st.sidebar.success(f"{city} removed from monitoring list!")
             break  # To avoid RuntimeError for changing list size during iteration
 
+icon_cache = get_icon_cache()
+
 # Display current weather updates
 if CITIES:
     weather_updates = get_weather_updates()  # Get weather updates
@@ -343,10 +680,8 @@ if CITIES:
         st.subheader(f"Weather in **{weather['city']}** ({weather['timestamp'].strftime('%A')})")  # Show current day
 
         # Load and display weather icon
-        icon_url = f"http://openweathermap.org/img/wn/{weather['icon']}@2x.png"
         try:
-            img = Image.open(BytesIO(requests.get(icon_url).content))
-            st.image(img, width=100)
+            st.image(icon_cache.get(weather['icon']), width=100)
         except:
             st.write("Icon not available.")
 
@@ -411,11 +746,7 @@ if CITIES:
 
                 with col4:
                     try:
-                        icon_url = f"http://openweathermap.org/img/wn/{row['icon']}@2x.png"
-                        response = requests.get(icon_url)
-                        response.raise_for_status()  # Raise an error for bad responses
-                        img = Image.open(BytesIO(response.content))
-                        st.image(img, width=50)
+                        st.image(icon_cache.get(row['icon']), width=50)
                     except Exception as e:
                         st.write("Icon not available.")
                         st.write(f"Error: {e}")  # Optional: Log the error for debugging
@@ -463,11 +794,7 @@ if CITIES:
 
     # Display Alerts (Logged within the main loop)
 
-    # Daily aggregate calculation at midnight
-    def daily_aggregation_job():
-        calculate_daily_aggregates()
-
-    scheduler.add_job(daily_aggregation_job, 'cron', hour=23, minute=59)  # Schedule daily at 23:59
+    # Daily summaries are updated as each reading is stored, so only ingestion is scheduled
     scheduler.add_job(get_weather_updates, 'interval', minutes=5)  # Call API every 5 minutes
     scheduler.start()
 